@@ -1,3 +1,31 @@
 from .gast import *
+from .gast import compile  # not star-exported, see gast.gast.__all__
+from .gast import __all__ as _gast_all
+from .gast import _lazy_nodes
+from .gast import __getattr__ as _getattr
 from .version import __version__
 from ast import NodeVisitor, NodeTransformer, iter_fields
+
+# Node classes created on first access are exported too, which creates them.
+__all__ = (_gast_all + sorted(_lazy_nodes) +
+           ['NodeVisitor', 'NodeTransformer', 'iter_fields'])
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_nodes) |
+                  {'aparse_file', 'aparse_many'})
+
+
+def __getattr__(name):
+    # the asyncio interface is only imported on demand, as asyncio is slow to
+    # import, and Python 2 can't even parse it
+    if name in ('aparse_file', 'aparse_many'):
+        from . import aio
+        value = globals()[name] = getattr(aio, name)
+        return value
+    # node classes created on first access, see gast.gast.__getattr__
+    if name not in _lazy_nodes:
+        raise AttributeError("module '{}' has no attribute '{}'"
+                             .format(__name__, name))
+    value = globals()[name] = _getattr(name)
+    return value
@@ -0,0 +1,61 @@
+"""
+asyncio interface to ``parse_file``, for Python 3.7 and later: files are
+parsed in an executor, so that the event loop is not blocked meanwhile.
+"""
+
+import asyncio
+import functools
+
+from gast.gast import parse_file
+
+
+async def aparse_file(path, executor=None, **kwargs):
+    """
+    Parse the source file at *path* in *executor*, by default the one of the
+    event loop, see ``parse_file`` for the keyword arguments.
+
+    Cancelling the call before the file is being parsed prevents it from
+    being parsed.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(parse_file, path, **kwargs))
+
+
+async def aparse_many(paths, concurrency=4, executor=None, **kwargs):
+    """
+    Parse the source files of *paths* in *executor*, by default the one of
+    the event loop, and generate (path, tree) pairs as soon as they are
+    parsed. If parsing a file raises an exception, typically a
+    ``SyntaxError``, it is generated in place of the tree. See
+    ``parse_file`` for the keyword arguments.
+
+    At most *concurrency* files are submitted to *executor* at once, and
+    the next ones only once results are consumed, so that *paths* may be a
+    long, or lazy, iterable. Pending files are cancelled when the generator
+    is closed, or the task consuming it cancelled.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    loop = asyncio.get_running_loop()
+    paths = iter(paths)
+    pending = {}
+    try:
+        while True:
+            for path in paths:
+                future = loop.run_in_executor(
+                    executor, functools.partial(parse_file, path, **kwargs))
+                pending[future] = path
+                if len(pending) == concurrency:
+                    break
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                error = future.exception()
+                yield path, future.result() if error is None else error
+    finally:
+        for future in pending:
+            future.cancel()
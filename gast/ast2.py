@@ -1,4 +1,5 @@
-from astn import AstToGAst, GAstToAst
+from astn import AstToGAst, GAstToAst, _generate_entry_points
+from astn import ConsumingConversion, LazyConversion, OriginTracking
 import ast
 import gast
 
@@ -91,7 +92,8 @@ class Ast2ToGAst(AstToGAst):
             what.end_lineno = what.end_col_offset = None
 
         if ntback is not None:
-            attr = gast.Attribute(what, 'with_traceback', gast.Load())
+            attr = gast.Attribute(what, 'with_traceback',
+                                  self._singletons[gast.Load])
             gast.copy_location(attr, node)
             attr.end_lineno = attr.end_col_offset = None
 
@@ -178,7 +180,7 @@ class Ast2ToGAst(AstToGAst):
 
     def visit_ExtSlice(self, node):
         new_dims = self._visit(node.dims)
-        new_node = gast.Tuple(new_dims, gast.Load())
+        new_node = gast.Tuple(new_dims, self._singletons[gast.Load])
         gast.copy_location(new_node, node)
         new_node.end_lineno = new_node.end_col_offset = None
         return new_node
@@ -194,7 +196,8 @@ class Ast2ToGAst(AstToGAst):
 
     def visit_Call(self, node):
         if node.starargs:
-            star = gast.Starred(self._visit(node.starargs), gast.Load())
+            star = gast.Starred(self._visit(node.starargs),
+                                self._singletons[gast.Load])
             gast.copy_location(star, node)
             star.end_lineno = star.end_col_offset = None
             starred = [star]
@@ -450,9 +453,18 @@ class GAstToAst2(GAstToAst):
         return new_node
 
 
-def ast_to_gast(node):
-    return Ast2ToGAst().visit(node)
+class LazyAst2ToGAst(LazyConversion, Ast2ToGAst):
+    pass
 
 
-def gast_to_ast(node):
-    return GAstToAst2().visit(node)
+class ConsumingGAstToAst2(ConsumingConversion, GAstToAst2):
+    pass
+
+
+class TrackingAst2ToGAst(OriginTracking, Ast2ToGAst):
+    pass
+
+
+ast_to_gast, gast_to_ast = _generate_entry_points(
+    Ast2ToGAst, LazyAst2ToGAst, TrackingAst2ToGAst,
+    GAstToAst2, ConsumingGAstToAst2)
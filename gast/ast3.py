@@ -1,4 +1,5 @@
-from gast.astn import AstToGAst, GAstToAst
+from gast.astn import AstToGAst, GAstToAst, _generate_entry_points
+from gast.astn import ConsumingConversion, LazyConversion, OriginTracking
 import gast
 import ast
 import sys
@@ -43,7 +44,8 @@ class Ast3ToGAst(AstToGAst):
     if sys.version_info.minor < 9:
 
         def visit_ExtSlice(self, node):
-            new_node = gast.Tuple(self._visit(node.dims), gast.Load())
+            new_node = gast.Tuple(self._visit(node.dims),
+                                  self._singletons[gast.Load])
             return gast.copy_location(new_node, node)
 
         def visit_Index(self, node):
@@ -162,7 +164,7 @@ class Ast3ToGAst(AstToGAst):
             if sys.version_info.minor < 5:
                 if node.starargs:
                     star = gast.Starred(self._visit(node.starargs),
-                                        gast.Load())
+                                        self._singletons[gast.Load])
                     gast.copy_location(star, node)
                     starred = [star]
                 else:
@@ -212,7 +214,7 @@ class Ast3ToGAst(AstToGAst):
             None,
             None,
         )
-        return ast.copy_location(new_node, node)
+        return gast.copy_location(new_node, node)
 
     def visit_arg(self, node):
         if sys.version_info.minor < 8:
@@ -222,19 +224,20 @@ class Ast3ToGAst(AstToGAst):
 
         new_node = gast.Name(
             node.arg,  # micro-optimization here, don't call self._visit
-            gast.Param(),
+            self._singletons[gast.Param],
             self._visit(node.annotation),
             extra_arg  # type_comment
         )
-        return ast.copy_location(new_node, node)
+        return gast.copy_location(new_node, node)
 
     def visit_ExceptHandler(self, node):
         if node.name:
             new_node = gast.ExceptHandler(
                 self._visit(node.type),
-                gast.Name(node.name, gast.Store(), None, None),
+                gast.Name(node.name, self._singletons[gast.Store],
+                          None, None),
                 self._visit(node.body))
-            return ast.copy_location(new_node, node)
+            return gast.copy_location(new_node, node)
         else:
             return self.generic_visit(node)
 
@@ -247,7 +250,7 @@ class Ast3ToGAst(AstToGAst):
                 ifs=self._visit(node.ifs),
                 is_async=0,
             )
-            return ast.copy_location(new_node, node)
+            return gast.copy_location(new_node, node)
 
     if 8 <= sys.version_info.minor < 12:
         def visit_FunctionDef(self, node):
@@ -330,7 +333,8 @@ class GAstToAst3(GAstToAst):
                         [adjust_slice(x) for x in
                          self._visit(node.slice.elts)])
                 else:
-                    value = ast.Tuple(self._visit(node.slice.elts), ast.Load())
+                    value = ast.Tuple(self._visit(node.slice.elts),
+                                      self._singletons[ast.Load])
                     ast.copy_location(value, node.slice)
                     new_slice = ast.Index(value)
             else:
@@ -570,9 +574,18 @@ class GAstToAst3(GAstToAst):
         return new_node
 
 
-def ast_to_gast(node):
-    return Ast3ToGAst().visit(node)
+class LazyAst3ToGAst(LazyConversion, Ast3ToGAst):
+    pass
+
+
+class ConsumingGAstToAst3(ConsumingConversion, GAstToAst3):
+    pass
+
+
+class TrackingAst3ToGAst(OriginTracking, Ast3ToGAst):
+    pass
 
 
-def gast_to_ast(node):
-    return GAstToAst3().visit(node)
+ast_to_gast, gast_to_ast = _generate_entry_points(
+    Ast3ToGAst, LazyAst3ToGAst, TrackingAst3ToGAst,
+    GAstToAst3, ConsumingGAstToAst3)
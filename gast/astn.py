@@ -1,44 +1,741 @@
 import ast
+import copy
 import gast
+import sys
+import threading
+from .gast import _PACKED_LOCATIONS, _LOCATIONS
+from .gast import _get_locations, _set_locations, _pack_location
+from .gast import _clock
+
+# The gast.gast module, still being imported, whose later definitions are
+# looked up at runtime. Python 2 binds gast to it rather than to the package.
+_gast = sys.modules[__name__.rpartition('.')[0] + '.gast']
+
+
+class _DispatchTable(dict):
+    """
+    Maps a source node class to the handler of translator class `owner` for
+    it: either a `visit_` method, or a specialized generic conversion.
+    """
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def __missing__(self, node_class):
+        class_name = node_class.__name__
+        name = 'visit_' + class_name
+        handler = getattr(self.owner, name, None)
+        if getattr(self.owner._target, class_name, None) is node_class:
+            # already a node of the target AST, typically one left unconverted
+            # by a selective conversion
+            handler = _keep
+        # NodeVisitor.visit_Constant only forwards to deprecated visitors
+        elif handler is None or handler is getattr(ast.NodeVisitor, name,
+                                                   None):
+            if self.owner.generic_visit == self.owner._generic_visit:
+                handler = self.owner._generic_handlers[node_class]
+            else:
+                handler = self.owner.generic_visit
+        if (self.owner._track and type(handler) is not _Converter and
+                handler is not _keep):
+            handler = _tracking(handler)
+        # concurrent translators may race to fill the same entry
+        return self.setdefault(node_class, handler)
+
+
+def _tracking(visit):
+    """
+    Wrap the handler *visit* so that the nodes it creates are linked to their
+    source node.
+    """
+    def handler(translator, node):
+        new_node = visit(translator, node)
+        if isinstance(new_node, gast.AST) and (new_node._fields or
+                                               new_node._attributes):
+            _gast._track(new_node, node)
+        return new_node
+    return handler
+
+
+def _unmodified_subtrees(root):
+    """
+    Map the id of the nodes of the tree rooted at *root* which, like their
+    whole subtree, are unmodified since their conversion, to the node they
+    were converted from, see `gast.gast._track`.
+
+    Setting an attribute unlinks a node from its source node. Children
+    replaced in place in a list are detected by comparing the source node of
+    each child with the matching child of the source node.
+    """
+    tracked = set(_gast._tracked_classes.values())
+    missing = object()
+
+    # Tracked nodes, with their source node and pairs of children and
+    # matching children of the source node, in pre-order. Pairs are None if
+    # the node is known to be modified.
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        cls = type(node)
+        if cls in tracked:
+            origin = node.__dict__['_origin']
+            pairs = []
+        else:
+            origin = pairs = None
+        for field in cls._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                stack.extend(item for item in value
+                             if isinstance(item, ast.AST))
+            elif isinstance(value, ast.AST):
+                stack.append(value)
+            else:
+                continue
+            if pairs is None:
+                continue
+            source = getattr(origin, field, missing)
+            if source is missing:
+                if field not in origin._fields:
+                    continue  # dropped by the conversion
+                source = None
+            if type(value) is not list:
+                pairs.append((value, source))
+            elif type(source) is list and len(source) == len(value):
+                pairs.extend(zip(value, source))
+            else:
+                pairs = None
+        if pairs is not None:
+            order.append((node, origin, pairs))
+
+    # children are processed before their parent
+    unmodified = {}
+    get = unmodified.get
+    for node, origin, pairs in reversed(order):
+        for value, source in pairs:
+            if get(id(value)) is source or value is source:
+                continue
+            cls = type(value)
+            # shared and immutable
+            if (isinstance(value, ast.AST) and not cls._fields and
+                    not cls._attributes and
+                    type(source).__name__ == cls.__name__):
+                continue
+            break
+        else:
+            unmodified[id(node)] = origin
+    return unmodified
+
+
+def _generate_converter(converter):
+    """
+    Generate the `expand` and `build` functions of *converter*, with
+    straight-line code specialized for the fields and attributes of its
+    node class, see `_Converter`.
+    """
+    fields = converter.fields
+    values = ["a{}".format(i) for i in range(len(fields))]
+    lines = ["def expand(node, container, key, push):"]
+    if not converter.positional:
+        lines.append("    return False")
+    else:
+        if fields:
+            lines.append("    try:")
+            lines.extend("        {} = node.{}".format(value, field)
+                         for value, field in zip(values, fields))
+            lines.append("    except AttributeError:")
+            lines.append("        return False")
+        lines.append("    args = [{}]".format(", ".join(values)))
+        if values:
+            lines.append("    if not ({}):".format(" or ".join(
+                "isinstance({}, (AST, list))".format(value)
+                for value in values)))
+            lines.append("        container[key] = build(node, args)")
+            lines.append("        return True")
+            if converter.consume:
+                # release the children as soon as they are converted
+                lines.extend("    node.{} = None".format(field)
+                             for field in fields)
+        lines.append("    container[key] = args")
+        lines.append("    push((converter, container, key, node))")
+        # children are pushed last first, so that they are converted in
+        # order
+        for i, value in reversed(list(enumerate(values))):
+            lines.append("    if type({}) is list:".format(value))
+            lines.append("        items = args[{}] = {}{}".format(
+                i, value, "" if converter.consume else "[:]"))
+            lines.append("        for i in range(len(items) - 1, -1, -1):")
+            lines.append("            item = items[i]")
+            lines.append("            if isinstance(item, (AST, list)):")
+            lines.append("                push((None, items, i, item))")
+            lines.append("    elif isinstance({}, AST):".format(value))
+            lines.append("        push((None, args, {}, {}))".format(i, value))
+        lines.append("    return True")
+
+    lines.append("def build(node, args):")
+    lines.append("    if type(args) is dict:")
+    lines.append("        new_node = cls(**args)")
+    lines.append("    else:")
+    lines.append("        new_node = cls(*args)")
+    if converter.packed:
+        lines.append("    set_locations(new_node, get_locations(node))")
+    elif converter.attributes:
+        lines.append("    try:")
+        lines.extend("        new_node.{0} = node.{0}".format(attr)
+                     for attr in converter.attributes)
+        lines.append("    except AttributeError:")
+        lines.append("        converter.copy_attributes(new_node, node)")
+    if converter.track:
+        lines.append("    new_node.__class__ = tracked_cls")
+        lines.append("    new_node.__dict__['_origin'] = node")
+    lines.append("    return new_node")
+
+    namespace = {'AST': ast.AST,
+                 'cls': converter.cls,
+                 'converter': converter,
+                 'get_locations': _get_locations,
+                 'set_locations': _set_locations,
+                 'tracked_cls': (converter.track and
+                                 _gast._tracked_class(converter.cls))}
+    code = compile("\n".join(lines),
+                   "<gast {} converter>".format(converter.cls.__name__),
+                   "exec")
+    exec(code, namespace)
+    return namespace['expand'], namespace['build']
+
+
+class _Converter(object):
+    """
+    Generic conversion of nodes of class *node_class* to *cls*, the class of
+    the same name in the target module: fields are converted and passed to
+    the constructor of *cls*, attributes are copied.
+
+    The conversion is performed by `Translator._convert`, through two
+    functions generated for each node class:
+
+    - `expand(node, container, key, push)` stores the fields of *node* in
+      `container[key]`, and pushes on the conversion stack the task of
+      building the new node, then the tasks converting the fields. It
+      returns False, without doing anything, if some fields are missing;
+    - `build(node, args)` creates the new node from the converted fields,
+      either a list or a dictionary, and copies the attributes of *node*.
+
+    If *consume* is true, the lists of the source node are converted in
+    place and its fields are reset once read, so that the source tree is
+    released as the conversion goes. If *track* is true, the new node is
+    linked to the source node, see `gast.gast._track`.
+    """
+
+    def __init__(self, node_class, cls, consume=False, track=False):
+        valid_fields = cls._fields
+        self.cls = cls
+        self.consume = consume
+        self.track = track
+        self.fields = tuple(field for field in node_class._fields
+                            if field in valid_fields)
+        # fields can be passed positionally unless some are missing
+        self.positional = self.fields == tuple(valid_fields[:len(self.fields)])
+        self.attributes = node_class._attributes
+        self.packed = (_PACKED_LOCATIONS and
+                       self.attributes == getattr(cls, '_attributes', ()) ==
+                       _LOCATIONS)
+        self.expand, self.build = _generate_converter(self)
+
+    def __call__(self, translator, node):
+        return translator._convert(node, self)
+
+    def copy_attributes(self, new_node, node):
+        for attr in self.attributes:
+            try:
+                setattr(new_node, attr, getattr(node, attr))
+            except AttributeError:
+                pass
+
+    def lazy(self, translator, node):
+        """
+        Create a node converting the fields of *node* on first access, with
+        the attributes of *node*.
+        """
+        if not self.fields:
+            return self.build(node, [])
+        cls = _gast._lazy_class(self.cls)
+        new_node = cls.__new__(cls)
+        new_node.__dict__['_lazy_source'] = (translator._visit, node,
+                                             self.fields)
+        if self.packed or '_location' in getattr(self.cls, '__slots__', ()):
+            # _set_locations doesn't recognize the lazy class as packed, and
+            # setting locations one by one would convert the fields
+            new_node._location = _pack_location(_get_locations(node))
+        else:
+            self.copy_attributes(new_node, node)
+        return new_node
+
+
+def _keep(translator, node):
+    return node
+
+
+class _SelectiveDispatchTable(dict):
+    """
+    Dispatch table of a translator instance whose handlers leave the nodes
+    rejected by *select* unconverted, along with their whole subtree, or
+    replace them by `keep(node)` if *keep* is given.
+    """
+
+    def __init__(self, dispatch, select, keep=None):
+        self.dispatch = dispatch
+        self.select = select
+        self.keep = keep or (lambda node: node)
+
+    def __missing__(self, node_class):
+        handler = self.dispatch[node_class]
+        select, keep = self.select, self.keep
+        if handler is _keep:
+            pass
+        elif type(handler) is _Converter:
+            # still a _Converter, so that Translator._convert expands it
+            expand, lazy = handler.expand, handler.lazy
+            handler = copy.copy(handler)
+
+            def selective_expand(node, container, key, push):
+                if select(node):
+                    return expand(node, container, key, push)
+                container[key] = keep(node)
+                return True
+
+            def selective_lazy(translator, node):
+                return lazy(translator, node) if select(node) else keep(node)
+
+            handler.expand = selective_expand
+            handler.lazy = selective_lazy
+        else:
+            visit = handler
+
+            def handler(translator, node):
+                return visit(translator, node) if select(node) else keep(node)
+        self[node_class] = handler
+        return handler
+
+
+class _GenericHandlerTables(object):
+    """
+    Gives each translator class the generic handlers matching its `_consume`
+    and `_track` flags.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.tables = {}
+
+    def __get__(self, instance, owner):
+        key = owner._consume, owner._track
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables.setdefault(key, self.factory(*key))
+        return table
+
+
+class _ProfilingDispatchTable(dict):
+    """
+    Dispatch table of translator class `owner` whose handlers record their
+    node count and exclusive time in *profile*, a `gast.ConversionProfile`.
+    """
+
+    def __init__(self, owner, profile):
+        self.owner = owner
+        self.profile = profile
+
+    def __missing__(self, node_class):
+        handler = self.owner._dispatch[node_class]
+        if type(handler) is _Converter:
+            name = 'generic_visit'
+        else:
+            name = getattr(handler, '__name__', 'generic_visit')
+            if not name.startswith('visit_'):
+                name = 'generic_visit'
+        key = self.owner.__name__, node_class.__name__, name
+        stats = self.profile.stats.setdefault(key, [0, 0.])
+        local, lock = self.profile.local, self.profile.lock
+
+        # Time spent in nested handlers is accumulated in local.nested, and
+        # subtracted from the time of the enclosing handler.
+        def timed(function, count):
+            def timed_function(*args):
+                start = _clock()
+                nested = getattr(local, 'nested', 0.)
+                local.nested = 0.
+                try:
+                    return function(*args)
+                finally:
+                    elapsed = _clock() - start
+                    with lock:
+                        stats[0] += count
+                        stats[1] += elapsed - local.nested
+                    local.nested = nested + elapsed
+            return timed_function
+
+        if type(handler) is _Converter:
+            # still a _Converter, so that Translator._convert expands it
+            converter, handler = handler, copy.copy(handler)
+            handler.expand = timed(converter.expand, 1)
+            handler.build = timed(converter.build, 0)
+            handler.lazy = timed(converter.lazy, 1)
+        elif handler is not _keep:
+            handler = timed(handler, 1)
+        return self.setdefault(node_class, handler)
+
+
+class _DispatchTables(object):
+    """
+    Gives each translator instance the dispatch table of its class, which
+    is built lazily, one node class at a time, or a profiling version of it
+    if a `gast.ConversionProfile` is active.
+    """
+
+    def __init__(self):
+        self.tables = {}
+
+    def __get__(self, instance, owner):
+        table = self.tables.get(owner)
+        if table is None:
+            table = self.tables.setdefault(owner, _DispatchTable(owner))
+        if instance is not None:
+            profile = _gast._profile
+            if profile is not None:
+                table = profile.tables.get(owner)
+                if table is None:
+                    table = profile.tables.setdefault(
+                        owner, _ProfilingDispatchTable(owner, profile))
+            instance.__dict__['_dispatch'] = table
+        return table
+
+
+class LazyConversion(object):
+    """
+    Translator mixin that defers the conversion of nodes without a dedicated
+    `visit_` method: the converted node gets its fields from the source node
+    on first access, see `gast.gast._lazy_class`.
+    """
+
+    def _visit(self, node):
+        if isinstance(node, ast.AST):
+            handler = self._dispatch[type(node)]
+            if type(handler) is _Converter:
+                return handler.lazy(self, node)
+            return handler(self, node)
+        elif isinstance(node, list):
+            return [self._visit(n) for n in node]
+        else:
+            return node
+
+    visit = _visit
+
+    def generic_visit(self, node):
+        handler = self._generic_handlers[type(node)]
+        if type(handler) is _Converter:
+            return handler.lazy(self, node)
+        return handler(self, node)
+
+
+class ConsumingConversion(object):
+    """
+    Translator mixin for source trees that are not used after their
+    conversion: the lists of generically converted nodes are converted in
+    place, and these nodes release their fields as they are converted.
+    """
+
+    _consume = True
+
+
+class OriginTracking(object):
+    """
+    Translator mixin that links the converted nodes to their source node,
+    until they are modified, so that ``gast_to_ast`` can return the source
+    nodes of unmodified subtrees, see `gast.gast._track`.
+    """
+
+    _track = True
+
+
+def _parallel_map(function, items, workers):
+    """
+    Return the list of `function(item)` for each item of *items*, computed by
+    *workers* threads, the current one included.
+    """
+    # More chunks than workers, so that a few large items don't leave the
+    # other threads idle.
+    size = max(1, len(items) // (4 * workers))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    results = [None] * len(chunks)
+    pending = iter(range(len(chunks)))
+    lock = threading.Lock()
+    errors = []
+
+    def work():
+        while not errors:
+            with lock:
+                index = next(pending, None)
+            if index is None:
+                return
+            try:
+                results[index] = [function(item) for item in chunks[index]]
+            except BaseException as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target=work)
+               for _ in range(min(workers, len(chunks)) - 1)]
+    for thread in threads:
+        thread.start()
+    work()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return [result for chunk in results for result in chunk]
 
 
 def _generate_translators(to):
 
+    class Singletons(dict):
+        def __missing__(self, cls):
+            instance = self[cls] = cls()
+            return instance
+
+    # Nodes without fields nor attributes (expression contexts and operators)
+    # carry no information beyond their type, so a single instance per class
+    # is shared by every converted tree, as CPython's parser already does.
+    singletons = Singletons()
+
+    def make_generic_handler(node_class, consume, track):
+        class_name = node_class.__name__
+        if not hasattr(to, class_name):
+            # handle nodes that are not part of the AST
+            return lambda self, node: None
+
+        cls = getattr(to, class_name)
+        valid_fields = getattr(cls, '_fields', ())
+        if not valid_fields and not getattr(cls, '_attributes', ()):
+            singleton = singletons[cls]
+            return lambda self, node: singleton
+
+        # frozen nodes may be shared, and can't be consumed anyway
+        consume = consume and node_class not in _gast._variant_bases
+        return _Converter(node_class, cls, consume, track)
+
+    class GenericHandlers(dict):
+        def __init__(self, consume, track):
+            self.consume = consume
+            self.track = track
+
+        def __missing__(self, node_class):
+            handler = self[node_class] = make_generic_handler(
+                node_class, self.consume, self.track)
+            return handler
+
     class Translator(ast.NodeTransformer):
 
+        _target = to
+
+        _singletons = singletons
+
+        # Conversion handler of each source node class, per translator class,
+        # so that visiting a node costs a single dictionary lookup.
+        _dispatch = _DispatchTables()
+
+        _consume = False
+
+        _track = False
+
+        _generic_handlers = _GenericHandlerTables(GenericHandlers)
+
         def _visit(self, node):
             if isinstance(node, ast.AST):
-                return self.visit(node)
+                handler = self._dispatch[type(node)]
+                if type(handler) is _Converter:
+                    return self._convert(node, handler)
+                return handler(self, node)
             elif isinstance(node, list):
-                return [self._visit(n) for n in node]
+                return self._convert(node)
             else:
                 return node
 
-        def generic_visit(self, node):
-            class_name = type(node).__name__
-            if not hasattr(to, class_name):
-                # handle nodes that are not part of the AST
-                return
-            cls = getattr(to, class_name)
-            valid_fields = getattr(cls, '_fields', ())
-            new_node = cls(
-                **{
-                    field: self._visit(getattr(node, field))
-                    for field in node._fields
-                    if hasattr(node, field) and field in valid_fields
-                }
-            )
-
-            for attr in node._attributes:
-                try:
-                    setattr(new_node, attr, getattr(node, attr))
-                except AttributeError:
-                    pass
+        def visit(self, node):
+            return self._convert(node)
+
+        def select(self, predicate):
+            """
+            Only convert the nodes for which *predicate* is true: the others
+            are left as is, along with their whole subtree.
+            """
+            self._dispatch = _SelectiveDispatchTable(self._dispatch,
+                                                     predicate)
+            return self
+
+        def parallel_visit(self, node, workers):
+            """
+            Convert *node*, a module, the statements of its body being
+            converted by *workers* threads sharing this translator.
+            """
+            shell = copy.copy(node)
+            shell.body = []
+            new_node = self.visit(shell)
+            if new_node is shell:  # left unconverted by a selective conversion
+                return node
+            new_node.body = _parallel_map(self.visit, node.body, workers)
+            if self._track:
+                # setting the body unlinked it from the shell
+                _gast._track(new_node, node)
             return new_node
 
+        def reuse_origins(self, root):
+            """
+            Convert the unmodified subtrees of *root* to the node they were
+            converted from, see `OriginTracking`, instead of converting them
+            again.
+            """
+            unmodified = _unmodified_subtrees(root)
+            if unmodified:
+                self._dispatch = _SelectiveDispatchTable(
+                    self._dispatch,
+                    lambda node: id(node) not in unmodified,
+                    lambda node: unmodified[id(node)])
+            return self
+
+        def _convert(self, root, converter=None):
+            """
+            Convert *root*, a node or a list, using an explicit stack rather
+            than recursion, so that the depth of the tree is not limited by
+            the interpreter stack.
+
+            Nodes handled by a `_Converter` are expanded in place: their
+            fields are pushed on the stack, and the new node is built once
+            they are all converted. Other handlers are called directly and
+            may themselves call `_visit`, which runs a nested conversion:
+            only the nesting of nodes that have a `visit_` method, such as
+            function or class definitions, still uses the interpreter stack.
+            """
+            dispatch = self._dispatch
+            result = [None]
+            # Tasks are (converter, container, key, value) tuples. When
+            # *converter* is None, *value* is to be converted and stored in
+            # container[key]. Otherwise container[key] holds the converted
+            # fields of *value*, from which *converter* builds the new node.
+            stack = [(None, result, 0, root)]
+            pop, push = stack.pop, stack.append
+            forced = converter
+            while stack:
+                converter, container, key, value = pop()
+                if converter is not None:
+                    container[key] = converter.build(value, container[key])
+                    continue
+
+                if isinstance(value, list):
+                    new_list = container[key] = value[:]
+                    for i in range(len(value) - 1, -1, -1):
+                        item = value[i]
+                        if isinstance(item, (ast.AST, list)):
+                            push((None, new_list, i, item))
+                    continue
+
+                if forced is not None:
+                    converter, forced = forced, None
+                else:
+                    converter = dispatch[type(value)]
+                    if type(converter) is not _Converter:
+                        container[key] = converter(self, value)
+                        continue
+
+                if converter.expand(value, container, key, push):
+                    continue
+
+                # Some fields are missing, pass the others by keyword. The
+                # converted fields temporarily live where the new node is
+                # going to be stored.
+                args = container[key] = {field: getattr(value, field)
+                                         for field in converter.fields
+                                         if hasattr(value, field)}
+                push((converter, container, key, value))
+                for field in reversed(converter.fields):
+                    arg = args.get(field)
+                    if isinstance(arg, (ast.AST, list)):
+                        push((None, args, field, arg))
+            return result[0]
+
+        def generic_visit(self, node):
+            return self._generic_handlers[type(node)](self, node)
+
+        _generic_visit = generic_visit
+
     return Translator
 
 
 AstToGAst = _generate_translators(gast)
 
 GAstToAst = _generate_translators(ast)
+
+
+def _generate_entry_points(to_gast, lazy_to_gast, tracking_to_gast, to_ast,
+                           consuming_to_ast):
+    """
+    Return the `ast_to_gast` and `gast_to_ast` functions of the translators
+    of the running Python version, see `gast.ast3` and `gast.ast2`.
+    """
+    def ast_to_gast(node, lazy=False, select=None, retain=False, workers=1):
+        """
+        Convert the ast tree rooted at *node* to gast.
+
+        If *lazy* is true, most nodes convert their fields from the
+        corresponding ast node on first access to any of their missing
+        attribute, instead of right away. Until then, they are instances of a
+        subclass of their node class, with the same name.
+
+        If *select* is given, it is called on each ast node before its
+        conversion: the nodes it rejects are kept in the gast tree as is,
+        along with their whole subtree, and are left as is by
+        ``gast_to_ast``.
+
+        If *retain* is true, converted nodes keep a link to their source node
+        until they are modified, and ``gast_to_ast`` returns the source node
+        of unmodified subtrees instead of converting them again. The ast tree
+        should not be modified meanwhile. This is not compatible with *lazy*.
+
+        If *workers* is greater than one and *node* is a module, the
+        statements of its body are converted by as many threads. This only
+        speeds up the conversion on free-threaded builds of Python. It has no
+        effect with *lazy*, as lazy conversion is deferred anyway.
+        """
+        if lazy and retain:
+            raise ValueError("lazy and retain are mutually exclusive")
+        if retain:
+            translator = tracking_to_gast()
+        elif lazy:
+            translator = lazy_to_gast()
+        else:
+            translator = to_gast()
+        if select is not None:
+            translator.select(select)
+        if workers > 1 and not lazy and isinstance(node, ast.Module):
+            return translator.parallel_visit(node, workers)
+        return translator.visit(node)
+
+    def gast_to_ast(node, consume=False):
+        """
+        Convert the gast tree rooted at *node* to ast.
+
+        If *consume* is true, the gast tree is released as it is converted,
+        to lower the peak memory usage: its lists are reused by the ast tree,
+        and its nodes are emptied. The gast tree can't be used afterwards,
+        and shouldn't share nodes, except frozen ones.
+
+        Unmodified subtrees of a tree converted by ``ast_to_gast`` with
+        *retain* set are converted to their source ast nodes, as long as the
+        root of the tree itself is unmodified.
+        """
+        translator = consuming_to_ast() if consume else to_ast()
+        # only trees whose root is unmodified since its conversion are walked
+        cls = type(node)
+        if _gast._tracked_classes.get(cls.__bases__[0]) is cls:
+            translator.reuse_origins(node)
+        return translator.visit(node)
+
+    return ast_to_gast, gast_to_ast
@@ -0,0 +1,232 @@
+"""
+Persistent cache of the gast trees parsed from files, much like
+``__pycache__`` for bytecode.
+
+Each entry is a file of the cache directory holding a header, made of the
+absolute path of the source file, its modification time, size and hash, and
+the pickled tree. Entries are specific to the Python version and to the gast
+version that wrote them. They are written to a temporary file first, then
+atomically renamed, so that concurrent writers and readers never see a
+partial entry.
+
+Stale entries, and the least recently used ones, are removed by::
+
+    python -m gast.cache prune [--max-age DAYS] [--max-size MIB] [directory]
+"""
+
+from __future__ import absolute_import
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import gast
+from gast.gast import _load_tree
+
+_replace = getattr(os, 'replace', os.rename)  # python2
+
+# Entries written by another interpreter or another gast are ignored.
+_TAG = (getattr(getattr(sys, 'implementation', None), 'cache_tag', None) or
+        'python-{}{}'.format(*sys.version_info[:2]), gast.__version__)
+
+_SUFFIX = '.gast'
+
+_ENTRY_ERRORS = (IOError, OSError, EOFError, ValueError, TypeError,
+                 AttributeError, IndexError, KeyError,  # python2 garbage
+                 pickle.UnpicklingError)
+
+
+def default_directory():
+    """
+    Return the default cache directory: ``$GAST_CACHE_DIR`` if set, or
+    ``gast`` in the user cache directory.
+    """
+    directory = os.environ.get('GAST_CACHE_DIR')
+    if directory:
+        return directory
+    root = (os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(root, 'gast')
+
+
+def _stamp(stat):
+    return getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size
+
+
+class DiskCache(object):
+    """
+    Cache of the trees parsed from files, stored in *directory*, see
+    ``default_directory``. The cache is safe to share between threads and
+    processes. If an entry can't be written, for instance because the
+    directory is read-only, the tree is returned all the same.
+
+    ``hits`` and ``misses`` count the calls to ``parse`` that found, or
+    didn't find, a valid entry.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, path, kwargs):
+        """
+        Return the path of the entry of source file *path*, parsed with the
+        keyword arguments *kwargs*.
+        """
+        key = repr((_TAG, path, sorted(kwargs.items())))
+        name = hashlib.sha1(key.encode('utf-8', 'surrogatepass')).hexdigest()
+        return os.path.join(self.directory, name + _SUFFIX)
+
+    def parse(self, path, **kwargs):
+        """
+        Return the gast tree of source file *path*, see ``gast.parse`` for
+        the keyword arguments. The file is only read if its modification
+        time or size changed since the entry was written, and only parsed if
+        its content changed too.
+        """
+        path = os.path.abspath(path)
+        entry = self.entry_path(path, kwargs)
+        stamp = _stamp(os.stat(path))
+        source = digest = tree = None
+        try:
+            with open(entry, 'rb') as f:
+                tag, _, entry_stamp, entry_digest = pickle.load(f)
+                if tag == _TAG:
+                    if entry_stamp != stamp:
+                        with open(path, 'rb') as src:
+                            source = src.read()
+                        digest = hashlib.sha1(source).digest()
+                    if digest in (None, entry_digest):
+                        data = f.read()
+                        tree = _load_tree(data)
+        except _ENTRY_ERRORS:
+            pass  # missing or unreadable entry
+
+        if tree is not None:
+            self.hits += 1
+            if digest is None:
+                try:
+                    os.utime(entry, None)  # for pruning
+                except OSError:
+                    pass  # pruned meanwhile
+            else:  # touched, but unchanged
+                self._write(entry, path, stamp, digest, data)
+            return tree
+
+        self.misses += 1
+        if source is None:
+            with open(path, 'rb') as src:
+                source = src.read()
+            digest = hashlib.sha1(source).digest()
+        tree = gast.parse(source, path, **kwargs)
+        self._write(entry, path, stamp, digest,
+                    pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+        return tree
+
+    def _write(self, entry, path, stamp, digest, data):
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            pass  # already there, or reported below
+        try:
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump((_TAG, path, stamp, digest), f,
+                                pickle.HIGHEST_PROTOCOL)
+                    f.write(data)
+                _replace(tmp, entry)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        except (IOError, OSError):
+            pass  # not cached, the tree is parsed again next time
+
+    def prune(self, max_age=None, max_size=None):
+        """
+        Remove the entries whose source file changed or disappeared, the
+        entries written by another Python or gast version, the entries not
+        used for more than *max_age* seconds and then the least recently
+        used entries until the cache holds at most *max_size* bytes. Return
+        the number of files removed.
+        """
+        now = time.time()
+        removed = 0
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            entry = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(entry)
+                if name.endswith('.tmp'):
+                    # left by an interrupted writer
+                    stale = now - stat.st_mtime > 3600
+                elif not name.endswith(_SUFFIX):
+                    continue
+                elif max_age is not None and now - stat.st_mtime > max_age:
+                    stale = True
+                else:
+                    with open(entry, 'rb') as f:
+                        tag, path, stamp, _ = pickle.load(f)
+                    stale = tag != _TAG or _stamp(os.stat(path)) != stamp
+            except _ENTRY_ERRORS:
+                stale = True
+            if stale:
+                try:
+                    os.remove(entry)
+                    removed += 1
+                except OSError:
+                    pass
+            elif name.endswith(_SUFFIX):
+                entries.append((stat.st_mtime, stat.st_size, entry))
+
+        if max_size is not None:
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, entry in sorted(entries):
+                if size <= max_size:
+                    break
+                try:
+                    os.remove(entry)
+                    removed += 1
+                except OSError:
+                    pass
+                size -= entry_size
+        return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gast.cache',
+                                     description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command')
+    prune = commands.add_parser('prune', help='remove stale entries')
+    prune.add_argument('directory', nargs='?', default=None,
+                       help='cache directory (default: {})'.format(
+                           default_directory()))
+    prune.add_argument('--max-age', type=float, metavar='DAYS',
+                       help='remove the entries unused for DAYS days')
+    prune.add_argument('--max-size', type=float, metavar='MIB',
+                       help='remove the least recently used entries beyond '
+                            'MIB mebibytes')
+    args = parser.parse_args(argv)
+    if args.command != 'prune':
+        parser.print_usage()
+        return 2
+
+    cache = DiskCache(args.directory)
+    removed = cache.prune(
+        None if args.max_age is None else args.max_age * 24 * 3600,
+        None if args.max_size is None else int(args.max_size * 2 ** 20))
+    print("removed {} files from {}".format(removed, cache.directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
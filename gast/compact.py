@@ -0,0 +1,371 @@
+"""
+Compact, array-backed representation of gast trees.
+
+A ``CompactTree`` stores a whole tree as a handful of flat arrays instead of
+one Python object per node:
+
+- ``kinds`` holds, for each node, an integer code identifying its class;
+- ``first_slot`` holds, for each node, the offset of its first field in
+  ``slots``;
+- ``slots`` holds one encoded value per field (and non-location attribute) of
+  each node, in ``_fields`` order;
+- ``items`` holds the content of list fields, each list being stored as its
+  length followed by its encoded elements;
+- ``lineno``, ``col_offset``, ``end_lineno`` and ``end_col_offset`` are
+  location columns;
+- ``constants`` holds every non-node value (identifiers, literals, None...).
+
+Nodes are numbered in breadth-first order, the root having index 0. The tree
+can be navigated through ``CompactTree.node`` without building any gast node,
+converted back with ``from_compact`` and serialized with
+``CompactTree.tobytes``.
+"""
+
+from __future__ import absolute_import
+
+from array import array
+import marshal
+import struct
+import sys
+
+import gast
+from gast.gast import _nodes, _base_class
+
+_LOCATIONS = ('lineno', 'col_offset', 'end_lineno', 'end_col_offset')
+
+# Encoded values are tagged integers: the two lower bits hold the tag, the
+# remaining ones the index in the relevant table.
+_NODE, _CONSTANT, _LIST, _MISSING = range(4)
+
+# Sentinels for the location columns.
+_UNSET = -2 ** 31
+_NONE = _UNSET + 1
+
+_MAGIC = b'GAST\x01'
+
+KINDS = tuple(name for name, _ in _nodes)
+
+_codes = {name: code for code, name in enumerate(KINDS)}
+
+_tobytes = getattr(array, 'tobytes', None) or array.tostring  # python2
+_frombytes = getattr(array, 'frombytes', None) or array.fromstring  # python2
+
+
+def _slot_names(kind):
+    cls = getattr(gast, kind)
+    return cls._fields + tuple(attr for attr in cls._attributes
+                               if attr not in _LOCATIONS)
+
+
+class _Layouts(dict):
+    """
+    Slot names of each kind code, computed on first use, so that the node
+    classes created on first access are only created for the kinds in use.
+    """
+
+    def __init__(self, kinds):
+        dict.__init__(self)
+        self.kinds = kinds
+
+    def __missing__(self, code):
+        layout = self[code] = _slot_names(self.kinds[code])
+        return layout
+
+
+class CompactTree(object):
+    """
+    Struct-of-arrays storage for a gast tree, see the module documentation.
+    """
+
+    def __init__(self, kinds=KINDS):
+        self.names = kinds
+        self.kinds = array('i')
+        self.first_slot = array('i')
+        self.slots = array('i')
+        self.items = array('i')
+        self.lineno = array('i')
+        self.col_offset = array('i')
+        self.end_lineno = array('i')
+        self.end_col_offset = array('i')
+        self.constants = []
+        self._layouts = _Layouts(kinds)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, index):
+        """Return the class name of the node at *index*."""
+        return self.names[self.kinds[index]]
+
+    def location(self, index):
+        """
+        Return the ``(lineno, col_offset, end_lineno, end_col_offset)`` tuple
+        of the node at *index*, unset values being reported as None.
+        """
+        return tuple(None if value <= _NONE else value
+                     for value in (self.lineno[index],
+                                   self.col_offset[index],
+                                   self.end_lineno[index],
+                                   self.end_col_offset[index]))
+
+    def field(self, index, name):
+        """
+        Return the value of field *name* of the node at *index*. Child nodes
+        are returned as ``CompactNode`` views and list fields as lists.
+        """
+        layout = self._layouts[self.kinds[index]]
+        try:
+            offset = layout.index(name)
+        except ValueError:
+            raise AttributeError("'{}' node has no field '{}'"
+                                 .format(self.kind(index), name))
+        code = self.slots[self.first_slot[index] + offset]
+        if code & 3 == _MISSING:
+            raise AttributeError("'{}' node has no value for field '{}'"
+                                 .format(self.kind(index), name))
+        return self._decode(code)
+
+    def _decode(self, code):
+        tag, index = code & 3, code >> 2
+        if tag == _NODE:
+            return CompactNode(self, index)
+        if tag == _CONSTANT:
+            return self.constants[index]
+        size = self.items[index]
+        return [self._decode(item)
+                for item in self.items[index + 1:index + 1 + size]]
+
+    def children(self, index):
+        """Return the indices of the direct children of the node at *index*."""
+        children = []
+        start = self.first_slot[index]
+        stop = start + len(self._layouts[self.kinds[index]])
+        for code in self.slots[start:stop]:
+            tag = code & 3
+            if tag == _NODE:
+                children.append(code >> 2)
+            elif tag == _LIST:
+                offset = code >> 2
+                size = self.items[offset]
+                children.extend(item >> 2
+                                for item in self.items[offset + 1:
+                                                       offset + 1 + size]
+                                if item & 3 == _NODE)
+        return children
+
+    def node(self, index=0):
+        """Return a read-only view on the node at *index*."""
+        return CompactNode(self, index)
+
+    def find(self, kind):
+        """Yield the index of every node whose class name is *kind*."""
+        code = self.names.index(kind)
+        for index, node_kind in enumerate(self.kinds):
+            if node_kind == code:
+                yield index
+
+    def tobytes(self):
+        """Serialize the tree to a bytes object, see ``from_compact``."""
+        header = marshal.dumps((sys.byteorder, self.kinds.itemsize,
+                                self.names, self.constants,
+                                len(self.kinds), len(self.slots),
+                                len(self.items)))
+        chunks = [_MAGIC, struct.pack('<I', len(header)), header]
+        for column in self._columns():
+            chunks.append(_tobytes(column))
+        return b''.join(chunks)
+
+    @classmethod
+    def frombytes(cls, buf):
+        """Build a ``CompactTree`` from the output of ``tobytes``."""
+        buf = memoryview(buf)
+        if buf[:len(_MAGIC)].tobytes() != _MAGIC:
+            raise ValueError("not a serialized gast tree")
+        offset = len(_MAGIC)
+        header_size, = struct.unpack('<I', buf[offset:offset + 4].tobytes())
+        offset += 4
+        (byteorder, itemsize, names, constants,
+         nb_nodes, nb_slots, nb_items) = marshal.loads(
+             buf[offset:offset + header_size].tobytes())
+        offset += header_size
+
+        self = cls(names)
+        self.constants = constants
+        sizes = (nb_nodes, nb_nodes, nb_slots, nb_items,
+                 nb_nodes, nb_nodes, nb_nodes, nb_nodes)
+        for column, size in zip(self._columns(), sizes):
+            _frombytes(column, buf[offset:offset + size * itemsize].tobytes())
+            offset += size * itemsize
+            if byteorder != sys.byteorder:
+                column.byteswap()
+        return self
+
+    def _columns(self):
+        return (self.kinds, self.first_slot, self.slots, self.items,
+                self.lineno, self.col_offset, self.end_lineno,
+                self.end_col_offset)
+
+
+class CompactNode(object):
+    """
+    Lightweight view on a node of a ``CompactTree``. Fields and locations are
+    available as attributes, decoded on each access.
+    """
+
+    __slots__ = 'tree', 'index'
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def kind(self):
+        return self.tree.kind(self.index)
+
+    @property
+    def _fields(self):
+        return getattr(gast, self.kind)._fields
+
+    def __getattr__(self, name):
+        if name in _LOCATIONS:
+            value = getattr(self.tree, name)[self.index]
+            if value == _UNSET:
+                raise AttributeError(name)
+            return None if value == _NONE else value
+        return self.tree.field(self.index, name)
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactNode) and self.tree is other.tree and
+                self.index == other.index)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        return '<{} node #{}>'.format(self.kind, self.index)
+
+
+def to_compact(tree):
+    """
+    Build a ``CompactTree`` from the gast *tree*.
+
+    Fields and attributes are stored, extra attributes set on nodes are not.
+    Trees partially converted with ``select``, which still hold ast nodes,
+    are not supported.
+    """
+    compact = CompactTree()
+    kinds, first_slot = compact.kinds, compact.first_slot
+    slots, items = compact.slots, compact.items
+    columns = (compact.lineno, compact.col_offset,
+               compact.end_lineno, compact.end_col_offset)
+    constants = compact.constants
+    layouts = compact._layouts
+    strings = {}
+    codes = {}  # by node class, variants included
+
+    nodes = [tree]
+
+    def encode(value):
+        if isinstance(value, gast.AST):
+            nodes.append(value)
+            return ((len(nodes) - 1) << 2) | _NODE
+        if isinstance(value, list):
+            offset = len(items)
+            items.append(len(value))
+            items.extend([0] * len(value))
+            for i, elt in enumerate(value, offset + 1):
+                items[i] = encode(elt)
+            return (offset << 2) | _LIST
+        # Identifiers are very redundant, share them.
+        if type(value) is str:
+            if value not in strings:
+                strings[value] = len(constants)
+                constants.append(value)
+            return (strings[value] << 2) | _CONSTANT
+        constants.append(value)
+        return ((len(constants) - 1) << 2) | _CONSTANT
+
+    # Nodes are appended to `nodes` as they are discovered, which numbers them
+    # in breadth-first order without recursion.
+    index = 0
+    while index < len(nodes):
+        node = nodes[index]
+        index += 1
+        cls = type(node)
+        code = codes.get(cls)
+        if code is None:
+            name = cls.__name__
+            # ast nodes may share the name of a gast node
+            if (name not in _codes or
+                    getattr(gast, name) is not _base_class(cls)):
+                raise TypeError("unsupported node type: {}.{}"
+                                .format(cls.__module__, name))
+            code = codes[cls] = _codes[name]
+        kinds.append(code)
+        first_slot.append(len(slots))
+        for name in layouts[code]:
+            try:
+                value = getattr(node, name)
+            except AttributeError:
+                slots.append(_MISSING)
+            else:
+                slots.append(encode(value))
+        for name, column in zip(_LOCATIONS, columns):
+            value = getattr(node, name, _UNSET)
+            column.append(_NONE if value is None else value)
+    return compact
+
+
+def from_compact(buf):
+    """
+    Build a gast tree from a ``CompactTree``, or from its serialized form as
+    produced by ``CompactTree.tobytes``.
+    """
+    if not isinstance(buf, CompactTree):
+        buf = CompactTree.frombytes(buf)
+    compact = buf
+
+    classes = {code: getattr(gast, compact.names[code])
+               for code in set(compact.kinds)}
+    layouts = compact._layouts
+    slots, items, constants = compact.slots, compact.items, compact.constants
+    columns = (compact.lineno, compact.col_offset,
+               compact.end_lineno, compact.end_col_offset)
+
+    # Create every node first, so that children are available when fields
+    # get filled.
+    singletons = {}
+    nodes = []
+    for code in compact.kinds:
+        cls = classes[code]
+        if not cls._fields and not cls._attributes:
+            if cls not in singletons:
+                singletons[cls] = cls()
+            nodes.append(singletons[cls])
+        else:
+            nodes.append(cls())
+
+    def decode(code):
+        tag, offset = code & 3, code >> 2
+        if tag == _NODE:
+            return nodes[offset]
+        if tag == _CONSTANT:
+            return constants[offset]
+        size = items[offset]
+        return [decode(item) for item in items[offset + 1:offset + 1 + size]]
+
+    for index, (node, code) in enumerate(zip(nodes, compact.kinds)):
+        offset = compact.first_slot[index]
+        for name in layouts[code]:
+            value = slots[offset]
+            offset += 1
+            if value & 3 != _MISSING:
+                setattr(node, name, decode(value))
+        for name, column in zip(_LOCATIONS, columns):
+            value = column[index]
+            if value != _UNSET:
+                setattr(node, name, None if value == _NONE else value)
+    return nodes[0]
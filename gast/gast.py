@@ -1,8 +1,23 @@
 import sys as _sys
+import os as _os
 import ast as _ast
 from ast import boolop, cmpop, excepthandler, expr, expr_context, operator
 from ast import slice, stmt, unaryop, mod, AST
 from ast import iter_child_nodes, walk
+from collections import OrderedDict as _OrderedDict
+from hashlib import sha1 as _sha1
+from operator import attrgetter as _attrgetter
+
+try:
+    from time import perf_counter as _clock
+except ImportError:  # python2
+    from time import time as _clock
+
+try:
+    from _thread import allocate_lock as _allocate_lock, RLock as _RLock
+except ImportError:  # python2
+    from thread import allocate_lock as _allocate_lock
+    from threading import RLock as _RLock
 
 try:
     from ast import TypeIgnore
@@ -24,36 +39,370 @@ except ImportError:
         pass
 
 
+# When GAST_PACKED_LOCATIONS is set (to anything but 0) in the environment,
+# the four location attributes of a node are stored in a single `_location`
+# slot, and exposed through properties. This saves memory and makes copying
+# locations cheaper, at the expense of slower individual accesses.
+_PACKED_LOCATIONS = _os.environ.get('GAST_PACKED_LOCATIONS', '0') != '0'
+
+_LOCATIONS = 'lineno', 'col_offset', 'end_lineno', 'end_col_offset'
+
+_LOCATION_BITS = 24
+_LOCATION_MASK = (1 << _LOCATION_BITS) - 1
+_LOCATION_LIMIT = _LOCATION_MASK - 2
+
+# The type of complete packed locations: long on Python 2, where the values
+# decoded from them are converted back to int.
+_PackedLocation = type(1 << (3 * _LOCATION_BITS))
+
+# Marks an unset location in the unpacked representation.
+_UNSET_LOCATION = object()
+
+# Marks an unset field.
+_MISSING = object()
+
+# The builtin, shadowed by gast.compile.
+_compile = compile
+
+
+def _pack_location(values):
+    """
+    Pack the four location values into a single integer. Each value uses
+    _LOCATION_BITS bits and is encoded as 0 when unset, 1 when None and as the
+    value plus 3 otherwise, so that -1 (the column of docstrings on Python 3.7
+    and earlier) is encoded as 2. Values that can't be encoded that way are
+    stored as a plain tuple.
+    """
+    lineno, col_offset, end_lineno, end_col_offset = values
+    # fast path: all values are set
+    if (type(lineno) is type(col_offset) is type(end_lineno) is
+            type(end_col_offset) is int and
+            -1 <= lineno < _LOCATION_LIMIT and
+            -1 <= col_offset < _LOCATION_LIMIT and
+            -1 <= end_lineno < _LOCATION_LIMIT and
+            -1 <= end_col_offset < _LOCATION_LIMIT):
+        return ((lineno + 3) |
+                (col_offset + 3) << _LOCATION_BITS |
+                (end_lineno + 3) << (2 * _LOCATION_BITS) |
+                (end_col_offset + 3) << (3 * _LOCATION_BITS))
+
+    packed = shift = 0
+    for value in values:
+        if value is _UNSET_LOCATION:
+            code = 0
+        elif value is None:
+            code = 1
+        elif type(value) is int and -1 <= value < _LOCATION_LIMIT:
+            code = value + 3
+        else:
+            return tuple(values)
+        packed |= code << shift
+        shift += _LOCATION_BITS
+    return packed
+
+
+def _is_complete_location(packed):
+    return (type(packed) is _PackedLocation and
+            packed & _LOCATION_MASK and
+            (packed >> _LOCATION_BITS) & _LOCATION_MASK and
+            (packed >> (2 * _LOCATION_BITS)) & _LOCATION_MASK and
+            packed >> (3 * _LOCATION_BITS))
+
+
+def _unpack_location(packed):
+    if type(packed) is tuple:
+        return packed
+    values = []
+    for _ in _LOCATIONS:
+        code = packed & _LOCATION_MASK
+        packed >>= _LOCATION_BITS
+        if code > 1:
+            values.append(int(code) - 3)
+        elif code:
+            values.append(None)
+        else:
+            values.append(_UNSET_LOCATION)
+    return tuple(values)
+
+
+def _location_property(index):
+    name = _LOCATIONS[index]
+    shift = index * _LOCATION_BITS
+
+    def missing(self):
+        return AttributeError("'{}' object has no attribute '{}'".format(
+            type(self).__name__, name))
+
+    def get_location(self):
+        try:
+            location = self._location
+        except AttributeError:
+            raise missing(self)
+        if type(location) is not tuple:
+            code = (location >> shift) & _LOCATION_MASK
+            if code > 1:
+                return int(code) - 3
+            if code:
+                return None
+        elif location[index] is not _UNSET_LOCATION:
+            return location[index]
+        raise missing(self)
+
+    def set_location(self, value):
+        try:
+            location = self._location
+        except AttributeError:
+            location = 0
+        if type(location) is not tuple:
+            if value is None:
+                code = 1
+            elif type(value) is int and -1 <= value < _LOCATION_LIMIT:
+                code = value + 3
+            else:
+                code = None
+            if code is not None:
+                location &= ~(_LOCATION_MASK << shift)
+                self._location = location | (code << shift)
+                return
+        values = list(_unpack_location(location))
+        values[index] = value
+        self._location = _pack_location(values)
+
+    def del_location(self):
+        get_location(self)
+        values = list(_unpack_location(self._location))
+        values[index] = _UNSET_LOCATION
+        self._location = _pack_location(values)
+
+    return property(get_location, set_location, del_location)
+
+
+_location_properties = {name: _location_property(i)
+                        for i, name in enumerate(_LOCATIONS)}
+
+
+def _get_locations(node):
+    """
+    Return the four location values of *node*, unset ones being reported as
+    _UNSET_LOCATION.
+    """
+    if '_location' in getattr(type(node), '__slots__', ()):
+        try:
+            return _unpack_location(node._location)
+        except AttributeError:
+            return (_UNSET_LOCATION,) * len(_LOCATIONS)
+    return (getattr(node, 'lineno', _UNSET_LOCATION),
+            getattr(node, 'col_offset', _UNSET_LOCATION),
+            getattr(node, 'end_lineno', _UNSET_LOCATION),
+            getattr(node, 'end_col_offset', _UNSET_LOCATION))
+
+
+def _set_locations(node, values):
+    """
+    Set the location values of *node* from the output of _get_locations.
+    """
+    if '_location' in getattr(type(node), '__slots__', ()):
+        node._location = _pack_location(values)
+    else:
+        for attr, value in zip(_LOCATIONS, values):
+            if value is not _UNSET_LOCATION:
+                setattr(node, attr, value)
+
+
+def _generate_constructor(Name, Fields):
+    """
+    Generate the constructor of node class *Name*. Positional arguments
+    initialize *Fields* in order, keyword arguments set the attribute of the
+    same name.
+
+    This constructor is used a lot during conversion from ast to gast, then
+    as the primary way to build ast nodes. So it is generated with one
+    unrolled assignment sequence per number of positional arguments, which
+    is much faster than a generic loop.
+    """
+    lines = ["def __init__(self, *args, **kwargs):"]
+    if Fields:
+        lines.append("    nargs = len(args)")
+    for nargs in range(len(Fields), 0, -1):
+        lines.append("    {} nargs == {}:".format(
+            'if' if nargs == len(Fields) else 'elif', nargs))
+        lines.append("        {}, = args".format(
+            ", ".join("self." + field for field in Fields[:nargs])))
+    lines.append("    {} args:".format('elif' if Fields else 'if'))
+    lines.append("        raise TypeError({!r})".format(
+        "{} constructor takes at most {} positional arguments".format(
+            Name, len(Fields))))
+    # Keywords that don't name a field or an attribute end up in the
+    # instance dictionary, as regular Python attributes would.
+    lines.append("    if kwargs:  # cold branch")
+    lines.append("        for key, value in kwargs.items():")
+    lines.append("            setattr(self, key, value)")
+
+    namespace = {}
+    code = _compile("\n".join(lines), "<gast {} constructor>".format(Name),
+                    "exec")
+    exec(code, namespace)
+    return namespace['__init__']
+
+
 def _make_node(Name, Fields, Attributes, Bases):
 
-    # This constructor is used a lot during conversion from ast to gast,
-    # then as the primary way to build ast nodes. So we tried to optimized it
-    # for speed and not for readability.
+    # Fields and attributes are stored in slots rather than in the instance
+    # dictionary, which roughly halves the memory footprint of a node. The
+    # instance dictionary inherited from AST is still there (and only
+    # allocated on demand) to hold any extra attribute set by the user.
+    Packed = _PACKED_LOCATIONS and Attributes == _LOCATIONS
+    if Packed:
+        Slots = Fields + ('_location',)
+    else:
+        Slots = Fields + Attributes
+    if not any(base.__dictoffset__ for base in Bases):
+        # Python 2's AST doesn't provide an instance dictionary
+        Slots += ('__dict__',)
+
+    # Some base classes provide a class-level default (typically None for
+    # end_lineno and end_col_offset), which the slot descriptors shadow.
+    Defaults = {}
+    for slot in Fields + Attributes:
+        for base in Bases:
+            if hasattr(base, slot):
+                Defaults[slot] = getattr(base, slot)
+                break
+
+    # Generating a constructor is not free, and most programs only ever
+    # instantiate a fraction of the node classes: the constructor is generated
+    # on first instantiation, and then replaces this one.
     def create_node(self, *args, **kwargs):
-        if len(args) > len(Fields):
-            raise TypeError(
-                "{} constructor takes at most {} positional arguments".
-                format(Name, len(Fields)))
-
-        # it's faster to iterate rather than zipping or enumerate
-        for i in range(len(args)):
-            setattr(self, Fields[i], args[i])
-        if kwargs:  # cold branch
-            self.__dict__.update(kwargs)
-
-    setattr(_sys.modules[__name__],
-            Name,
-            type(Name,
-                 Bases,
-                 {'__init__': create_node,
-                  '_fields': Fields,
-                  '_field_types': {},
-                  '_attributes': Attributes}))
+        init = _generate_constructor(Name, Fields)
+        Node.__init__ = init
+        init(self, *args, **kwargs)
+
+    HasLocations = all(attr in Attributes for attr in _LOCATIONS)
+    OtherAttributes = tuple(attr for attr in Attributes
+                            if not HasLocations or attr not in _LOCATIONS)
+
+    # Nodes are pickled as their class, the values of their fields in order,
+    # and, only if needed, a state made of their packed location and of any
+    # other attribute. This is much more compact than a dictionary per node.
+    def reduce_node(self):
+        values = [getattr(self, field, _MISSING) for field in Fields]
+        while values and values[-1] is _MISSING:
+            values.pop()
+
+        extras = {}
+        if _MISSING in values:  # cold branch
+            hole = values.index(_MISSING)
+            extras.update((field, value)
+                          for field, value in zip(Fields[hole:],
+                                                  values[hole:])
+                          if value is not _MISSING)
+            del values[hole:]
+        for attr in OtherAttributes:
+            value = getattr(self, attr, _MISSING)
+            if value is not _MISSING:
+                extras[attr] = value
+        if _sys.version_info >= (3, 11):
+            # doesn't allocate an instance dictionary if there's none
+            instance_dict = object.__getstate__(self)
+            if isinstance(instance_dict, tuple):
+                instance_dict = instance_dict[0]
+        else:
+            instance_dict = self.__dict__
+        if instance_dict:
+            extras.update(instance_dict)
+
+        location = None
+        if Packed:
+            location = getattr(self, '_location', None)
+        elif HasLocations:
+            location = _pack_location(
+                (getattr(self, 'lineno', _UNSET_LOCATION),
+                 getattr(self, 'col_offset', _UNSET_LOCATION),
+                 getattr(self, 'end_lineno', _UNSET_LOCATION),
+                 getattr(self, 'end_col_offset', _UNSET_LOCATION))) or None
+
+        if location is None and not extras:
+            return type(self), tuple(values)
+        return type(self), tuple(values), (location, extras or None)
+
+    def setstate_node(self, state):
+        if isinstance(state, dict):  # pickled by gast 0.7 and earlier
+            for key, value in state.items():
+                setattr(self, key, value)
+            return
+        location, extras = state
+        if location is not None:
+            if Packed:
+                self._location = location
+            else:
+                for attr, value in zip(_LOCATIONS,
+                                       _unpack_location(location)):
+                    if value is not _UNSET_LOCATION:
+                        setattr(self, attr, value)
+        if extras:
+            for key, value in extras.items():
+                setattr(self, key, value)
+
+    namespace = {'__init__': create_node,
+                 '__reduce__': reduce_node,
+                 '__setstate__': setstate_node,
+                 '__slots__': Slots,
+                 '_fields': Fields,
+                 '_field_types': _field_types_slot(),
+                 '_attributes': Attributes,
+                 '_defaults': Defaults}
+
+    if Packed:
+        namespace.update(_location_properties)
+
+    if Defaults:
+        def default_attr(self, attr):
+            try:
+                return Defaults[attr]
+            except KeyError:
+                raise AttributeError(
+                    "'{}' object has no attribute '{}'".format(Name, attr))
+        namespace['__getattr__'] = default_attr
+
+    Node = type(Name, Bases, namespace)
+    setattr(_sys.modules[__name__], Name, Node)
+    return Node
 
 def _fill_field_types(Name, FieldTypes):
-    node = getattr(_sys.modules[__name__], Name)
+    node = vars(_sys.modules[__name__])[Name]
     assert len(node._fields) == len(FieldTypes), Name
-    node._field_types.update(zip(node._fields, FieldTypes))
+    node._field_types = dict(zip(node._fields, FieldTypes))
+
+
+class _LazyFieldTypes(object):
+    """
+    Placeholder for the `_field_types` of node classes, that fills the
+    `_field_types` of every node class on first access.
+    """
+
+    def __get__(self, instance, owner):
+        _fill_all_field_types()
+        return owner._field_types
+
+
+def _field_types_slot():
+    if _sys.version_info < (3, 10) or _field_types_filled:
+        return {}
+    return _LazyFieldTypes()
+
+
+def _fill_all_field_types():
+    global _field_types_filled
+    with _lazy_lock:
+        if _field_types_filled:
+            return
+        created = vars(_sys.modules[__name__])
+        node_types = dict(_node_types())
+        for name, _ in _nodes:
+            if name in created:
+                _fill_field_types(name, node_types.get(name, ()))
+        _field_types_filled = True
+
 
 _nodes = (
     # mod
@@ -380,17 +729,54 @@ _nodes = (
                  (type_param,))),
     )
 
+# Node classes that only make sense for some Python versions are created on
+# first access, through the module-level __getattr__ below (Python 3.7+).
+_lazy_nodes = ('Suite', 'Print', 'Exec', 'Repr', 'Interpolation',
+               'TemplateStr', 'TypeVar', 'ParamSpec', 'TypeVarTuple')
+
+if _sys.version_info < (3, 7):
+    _lazy_nodes = ()
+
+_lazy_nodes = {_name: _descr for _name, _descr in _nodes
+               if _name in _lazy_nodes}
+
+_lazy_lock = _allocate_lock()
+
+_field_types_filled = False
+
 for _name, _descr in _nodes:
-    _make_node(_name, *_descr)
+    if _name not in _lazy_nodes:
+        _make_node(_name, *_descr)
+
+
+def __getattr__(name):
+    try:
+        descr = _lazy_nodes[name]
+    except KeyError:
+        raise AttributeError("module '{}' has no attribute '{}'"
+                             .format(__name__, name))
+    with _lazy_lock:
+        created = vars(_sys.modules[__name__])
+        if name not in created:
+            _make_node(name, *descr)
+            if _field_types_filled:
+                _fill_field_types(name, dict(_node_types()).get(name, ()))
+        return created[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_nodes))
+
 
 # As an exception to gast rule that states that all nodes are identical for all
 # python version, we don't fill the field type for python with a version lower
 # than 3.10. Those version lack type support to be compatible with the more
 # modern representation anyway. The _field_types still exists though, but it's
 # always empty.
-if _sys.version_info >= (3, 10):
-
-    _node_types = (
+# Otherwise, evaluating the table below is costly, so it only happens on first
+# access to the `_field_types` of a node class.
+def _node_types():
+    return (
         # mod
         ('Module', (list[stmt], list[type_ignore])),
         ('Interactive', (list[stmt],)),
@@ -497,9 +883,6 @@ if _sys.version_info >= (3, 10):
         ('TypeVarTuple', (str, expr | None), ),
     )
 
-    for _name, _types in _node_types:
-        _fill_field_types(_name, _types)
-
 if _sys.version_info.major == 2:
     from .ast2 import ast_to_gast, gast_to_ast
 if _sys.version_info.major == 3:
@@ -507,7 +890,143 @@ if _sys.version_info.major == 3:
 
 
 def parse(*args, **kwargs):
-    return ast_to_gast(_ast.parse(*args, **kwargs))
+    """
+    Parse the source into a gast tree, see ``ast.parse`` for the arguments.
+
+    If the extra *lazy* keyword argument is true, nodes convert their fields
+    from the underlying ``ast`` nodes on first access. If the extra *select*
+    keyword argument is given, only the subtrees it accepts are converted. If
+    the extra *retain* keyword argument is true, nodes are linked to the
+    underlying ``ast`` nodes until they are modified. The extra *workers*
+    keyword argument sets the number of threads converting the module body.
+    See ``ast_to_gast``.
+
+    If the extra *cache* keyword argument is a ``ParseCache``, the tree is
+    looked up there first, see ``ParseCache``.
+    """
+    lazy = kwargs.pop('lazy', False)
+    select = kwargs.pop('select', None)
+    retain = kwargs.pop('retain', False)
+    workers = kwargs.pop('workers', 1)
+    cache = kwargs.pop('cache', None)
+    if cache is not None:
+        if lazy or retain or select is not None:
+            raise ValueError("cache is not compatible with lazy, select and "
+                             "retain")
+        return _cached_parse(cache, args, kwargs, workers)
+    return ast_to_gast(_ast.parse(*args, **kwargs), lazy=lazy, select=select,
+                       retain=retain, workers=workers)
+
+
+def parse_file(path, **kwargs):
+    """
+    Parse the source file at *path* into a gast tree, see ``parse`` for the
+    keyword arguments. *filename* defaults to *path*.
+
+    The file is read as bytes, in a single call, and handed as is to the
+    parser, which decodes it according to its encoding declaration or BOM.
+    """
+    # unbuffered, so that the file is read at once, sized after fstat
+    with open(path, 'rb', 0) as f:
+        source = f.read()
+    kwargs.setdefault('filename', path)
+    return parse(source, **kwargs)
+
+
+def _load_tree(data):
+    """
+    Unpickle the tree pickled in *data*.
+    """
+    import gc
+    import pickle
+    # Trees are made of many small containers, which trigger collections
+    # that can't free anything while unpickling: this is several times
+    # faster without the garbage collector.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _parse_path(task):
+    import pickle
+    path, kwargs = task
+    try:
+        tree = parse_file(path, **kwargs)
+    except Exception as error:
+        return path, error, False
+    # pickled here so that the parent process unpickles it faster, see
+    # _load_tree
+    return path, pickle.dumps(tree, pickle.HIGHEST_PROTOCOL), True
+
+
+# a single path rather than an iterable of them
+_PATH_TYPES = (str, bytes, type(u''), getattr(_os, 'PathLike', str))
+
+
+def _expand_paths(paths_or_globs):
+    import glob
+    fspath = getattr(_os, 'fspath', None)  # python3.6+
+    if isinstance(paths_or_globs, _PATH_TYPES):
+        paths_or_globs = [paths_or_globs]
+    for pattern in paths_or_globs:
+        if fspath is not None:
+            pattern = fspath(pattern)
+        if _os.path.isdir(pattern):
+            suffix = b'.py' if isinstance(pattern, bytes) else u'.py'
+            for root, dirs, files in _os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(suffix):
+                        yield _os.path.join(root, name)
+        elif glob.has_magic(pattern):
+            for path in sorted(glob.glob(pattern)):
+                if not _os.path.isdir(path):
+                    yield path
+        else:
+            yield pattern
+
+
+def parse_paths(paths_or_globs, workers=None, ordered=True, **kwargs):
+    """
+    Parse source files with ``parse_file`` in *workers* processes (by
+    default, as many as CPUs), and generate (path, tree) pairs as the files
+    are parsed. If parsing a file raises an exception, typically a
+    ``SyntaxError``, it is generated in place of the tree.
+
+    *paths_or_globs* is an iterable of file paths, directories, scanned
+    recursively for ``.py`` files, and glob patterns, or a single one of
+    them. Results are generated in that order if *ordered* is true, in
+    completion order otherwise. The keyword arguments are passed to
+    ``parse_file``.
+    """
+    tasks = [(path, kwargs) for path in _expand_paths(paths_or_globs)]
+    if workers is None:
+        import multiprocessing
+        workers = multiprocessing.cpu_count()
+    if workers <= 1 or len(tasks) <= 1:
+        for path, _ in tasks:
+            try:
+                yield path, parse_file(path, **kwargs)
+            except Exception as error:
+                yield path, error
+        return
+
+    import multiprocessing
+    # small chunks, as file sizes vary a lot, but not too small either, as
+    # each chunk costs a round trip
+    chunksize = max(1, min(16, len(tasks) // (8 * workers)))
+    pool = multiprocessing.Pool(workers)
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for path, result, parsed in imap(_parse_path, tasks, chunksize):
+            yield path, _load_tree(result) if parsed else result
+    finally:
+        pool.terminate()
+        pool.join()
 
 
 def unparse(gast_obj):
@@ -537,6 +1056,766 @@ def get_docstring(node, clean=True):
     return text
 
 
+_frozen_classes = {}
+
+# Maps classes derived from a node class for internal purposes, which share
+# its name and layout, to the node class.
+_variant_bases = {}
+
+
+def _base_class(cls):
+    return _variant_bases.get(cls, cls)
+
+
+def _frozen_class(cls):
+    """
+    Return a subclass of *cls* whose instances can't be modified. It has the
+    same name and layout as *cls*, so that instances can switch between both.
+    """
+    try:
+        return _frozen_classes[cls]
+    except KeyError:
+        pass
+
+    def frozen(self, *args):
+        raise AttributeError("cannot modify interned '{}' node"
+                             .format(cls.__name__))
+
+    def reduce_node(self):
+        # copies and pickles of a frozen node are regular nodes
+        return (cls,) + cls.__reduce__(self)[1:]
+
+    frozen_cls = type(cls.__name__, (cls,),
+                      {'__slots__': (),
+                       '__module__': cls.__module__,
+                       '__setattr__': frozen,
+                       '__delattr__': frozen,
+                       '__reduce__': reduce_node})
+    frozen_cls = _frozen_classes.setdefault(cls, frozen_cls)
+    _variant_bases[frozen_cls] = cls
+    return frozen_cls
+
+
+_lazy_classes = {}
+
+# reentrant, as converting the fields of a node may access lazy nodes created
+# meanwhile
+_lazy_fields_lock = _RLock()
+
+
+def _lazy_class(cls):
+    """
+    Return a subclass of *cls* whose instances convert their fields on first
+    access to any attribute they lack, see ``ast_to_gast``. It has the same
+    name and layout as *cls*, instances become regular *cls* instances once
+    their fields are converted.
+
+    Until then, the instance dictionary holds a `_lazy_source` entry made of
+    the conversion function, the source node and the fields to convert.
+    """
+    try:
+        return _lazy_classes[cls]
+    except KeyError:
+        pass
+
+    def convert_fields(self):
+        with _lazy_fields_lock:
+            # fields may have been converted by another thread meanwhile
+            if type(self) is lazy_cls:
+                convert, source, fields = self.__dict__.pop('_lazy_source')
+                for field in fields:
+                    try:
+                        object.__getattribute__(self, field)
+                        continue  # explicitly set
+                    except AttributeError:
+                        pass
+                    try:
+                        value = getattr(source, field)
+                    except AttributeError:
+                        continue
+                    setattr(self, field, convert(value))
+                self.__class__ = cls
+
+    def lazy_getattr(self, attr):
+        convert_fields(self)
+        return getattr(self, attr)
+
+    def reduce_node(self):
+        convert_fields(self)
+        return cls.__reduce__(self)
+
+    lazy_cls = type(cls.__name__, (cls,),
+                    {'__slots__': (),
+                     '__module__': cls.__module__,
+                     '__getattr__': lazy_getattr,
+                     '__reduce__': reduce_node})
+    lazy_cls = _lazy_classes.setdefault(cls, lazy_cls)
+    _variant_bases[lazy_cls] = cls
+    return lazy_cls
+
+
+_tracked_classes = {}
+
+
+def _tracked_class(cls):
+    """
+    Return a subclass of *cls* whose instances are linked to the ast node
+    they were converted from, see ``ast_to_gast``. It has the same name and
+    layout as *cls*, instances become regular *cls* instances, and lose that
+    link, when any of their attributes is set or deleted.
+
+    The source node is held by the `_origin` entry of the instance
+    dictionary.
+    """
+    try:
+        return _tracked_classes[cls]
+    except KeyError:
+        pass
+
+    def untrack(self):
+        object.__setattr__(self, '__class__', cls)
+        self.__dict__.pop('_origin', None)
+
+    def setattr_node(self, attr, value):
+        untrack(self)
+        setattr(self, attr, value)
+
+    def delattr_node(self, attr):
+        untrack(self)
+        delattr(self, attr)
+
+    def reduce_node(self):
+        # copies and pickles of a tracked node are regular nodes
+        origin = self.__dict__.pop('_origin')
+        try:
+            return (cls,) + cls.__reduce__(self)[1:]
+        finally:
+            self.__dict__['_origin'] = origin
+
+    tracked_cls = type(cls.__name__, (cls,),
+                       {'__slots__': (),
+                        '__module__': cls.__module__,
+                        '__setattr__': setattr_node,
+                        '__delattr__': delattr_node,
+                        '__reduce__': reduce_node})
+    tracked_cls = _tracked_classes.setdefault(cls, tracked_cls)
+    _variant_bases[tracked_cls] = cls
+    return tracked_cls
+
+
+def _track(node, source):
+    """
+    Link *node* to *source*, the node it was converted from, unless *node* is
+    a frozen or lazy node, or is already linked: handlers such as
+    ``visit_Index`` return the converted child of *source*.
+    """
+    cls = type(node)
+    if cls in _variant_bases:
+        return node
+    node.__class__ = _tracked_class(cls)
+    node.__dict__['_origin'] = source
+    return node
+
+
+# 1, 1.0 and True compare equal, as do 0.0 and -0.0, but they must not be
+# interned together.
+_AMBIGUOUS_CONSTANTS = bool, float, complex, tuple, frozenset
+
+
+def _constant_key(value):
+    if type(value) in _AMBIGUOUS_CONSTANTS[1:]:
+        return type(value), repr(value)
+    return type(value), value
+
+
+_value_getters = {}
+
+
+def _values_getter(names):
+    getter = _attrgetter(*names) if names else (lambda node: ())
+    if len(names) == 1:
+        getter = (lambda get: lambda node: (get(node),))(getter)
+
+    def get_values(node):
+        try:
+            return getter(node)
+        except AttributeError:
+            return tuple(getattr(node, name, _MISSING) for name in names)
+
+    return get_values
+
+
+def _value_getters_of(cls):
+    """
+    Return the base class of *cls*, and three functions returning the values
+    of the fields, of the attributes and of the attributes other than
+    locations of a *cls* instance, _MISSING if unset.
+    """
+    base = _base_class(cls)
+    getters = (base, _values_getter(base._fields),
+               _values_getter(base._attributes),
+               _values_getter(tuple(attr for attr in base._attributes
+                                    if attr not in _LOCATIONS)))
+    return _value_getters.setdefault(cls, getters)
+
+
+def _post_order(tree):
+    """
+    Return the nodes of *tree*, each after its children, without recursion.
+    """
+    getters = _value_getters
+    order = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        try:
+            get_fields = getters[type(node)][1]
+        except KeyError:
+            get_fields = _value_getters_of(type(node))[1]
+        for value in get_fields(node):
+            if isinstance(value, AST):
+                stack.append(value)
+            elif type(value) is list:
+                stack.extend([item for item in value
+                              if isinstance(item, AST)])
+    order.reverse()
+    return order
+
+
+def _node_key(node, child_key, locations):
+    """
+    Return a hashable key of *node*, made of its base class, its attributes,
+    locations only if *locations* is true, and its field values, children
+    being represented by *child_key(child)*. Two nodes whose children have
+    equal keys have equal keys if and only if they compare equal, see
+    ``compare``.
+    """
+    base, get_fields, get_attributes, get_others = _value_getters[type(node)]
+    key = [base, get_attributes(node) if locations else get_others(node)]
+    for value in get_fields(node):
+        if isinstance(value, AST):
+            key.append(child_key(value))
+        elif type(value) is list:
+            key.append(tuple([child_key(item) if isinstance(item, AST)
+                              else _constant_key(item)
+                              for item in value]))
+        elif type(value) in _AMBIGUOUS_CONSTANTS:
+            key.append(_constant_key(value))
+        else:
+            key.append(value)
+    return tuple(key)
+
+
+class InternTable(object):
+    """
+    Table of interned subtrees, meant to be shared by successive calls to
+    ``intern_tree``.
+
+    If *locations* is true (the default), subtrees are only shared if their
+    locations match too. Otherwise locations are not taken into account
+    when comparing subtrees, and an interned subtree keeps the locations of
+    its first occurrence, which may belong to another tree.
+
+    ``hits`` counts the nodes replaced by an interned one, ``bytes_saved``
+    estimates the memory released by these replacements.
+    """
+
+    def __init__(self, locations=True):
+        self.locations = locations
+        self.nodes = {}
+        self.hits = 0
+        self.bytes_saved = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def intern_tree(tree, table):
+    """
+    Replace every subtree of *tree* structurally identical to a subtree
+    already registered in *table* by the registered one, and register the
+    others. Return the resulting tree.
+
+    Interned nodes are shared, so they are frozen: setting or deleting one of
+    their attributes raises an AttributeError. Their copies, as produced by
+    ``copy.copy`` or ``copy.deepcopy``, are regular nodes. List fields and
+    extra attributes set on nodes are not protected, and the latter are not
+    taken into account when comparing subtrees. The root of *tree* is not
+    frozen if it is a ``mod`` node.
+    """
+    nodes = table.nodes
+    locations = table.locations
+
+    canonical = {}
+
+    def child_key(child):
+        return canonical.get(id(child), child)
+
+    # children are interned before their parent
+    for node in _post_order(tree):
+        cls = type(node)
+        # already shared
+        if not cls._fields and not cls._attributes:
+            continue
+        if id(node) in canonical:
+            continue
+        frozen = _frozen_classes.get(cls.__bases__[0]) is cls
+
+        if not frozen:
+            for field in cls._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, AST):
+                    setattr(node, field, child_key(value))
+                elif isinstance(value, list):
+                    for i, item in enumerate(value):
+                        if isinstance(item, AST):
+                            value[i] = child_key(item)
+        key = _node_key(node, child_key, locations)
+
+        if node is tree and isinstance(node, mod):
+            canonical[id(node)] = node
+            continue
+
+        try:
+            interned = nodes.setdefault(key, node)
+        except TypeError:  # unhashable constant, can't be interned
+            canonical[id(node)] = node
+            continue
+
+        canonical[id(node)] = interned
+        if interned is node:
+            if not frozen:
+                node.__class__ = _frozen_class(_base_class(cls))
+        else:
+            table.hits += 1
+            table.bytes_saved += _sys.getsizeof(node) + sum(
+                _sys.getsizeof(getattr(node, field))
+                for field in cls._fields
+                if isinstance(getattr(node, field, None), list))
+
+    return canonical.get(id(tree), tree)
+
+
+def compare(a, b, compare_locations=False):
+    """
+    Return True if the trees *a* and *b* are structurally identical: their
+    nodes have the same types and the same field values. Locations are only
+    taken into account if *compare_locations* is true. Extra attributes set
+    on nodes are ignored.
+    """
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if isinstance(a, AST):
+            if not isinstance(b, AST):
+                return False
+            cls = _base_class(type(a))
+            if cls is not _base_class(type(b)):
+                return False
+            for field in cls._fields:
+                stack.append((getattr(a, field, _MISSING),
+                              getattr(b, field, _MISSING)))
+            for attr in cls._attributes:
+                if compare_locations or attr not in _LOCATIONS:
+                    stack.append((getattr(a, attr, _MISSING),
+                                  getattr(b, attr, _MISSING)))
+        elif isinstance(a, list):
+            if not isinstance(b, list) or len(a) != len(b):
+                return False
+            stack.extend(zip(a, b))
+        elif a is _MISSING or b is _MISSING:
+            return False
+        elif _constant_key(a) != _constant_key(b):
+            return False
+    return True
+
+
+def _hash_constant(value):
+    key = _constant_key(value)
+    try:
+        return hash(key)
+    except TypeError:
+        return hash((key[0], repr(value)))
+
+
+def structural_hash(node, locations=False, cache=None):
+    """
+    Return a hash of the tree rooted at *node* consistent with ``compare``:
+    trees that compare equal have the same hash. Locations are only taken into
+    account if *locations* is true. As for ``hash``, the result is only stable
+    within a given process.
+
+    If *cache* is a dictionary, the hash of every node of the tree is stored
+    in it, and hashes found there are reused without walking the
+    corresponding subtrees. The cache must be dropped whenever a node it
+    contains is modified, and must not be shared between calls with different
+    *locations* values.
+    """
+    hashes = {} if cache is None else cache
+    stack = [(node, False)]
+    while stack:
+        current, ready = stack.pop()
+        if id(current) in hashes:
+            continue
+        if not ready:
+            stack.append((current, True))
+            stack.extend((child, False)
+                         for child in iter_child_nodes(current))
+            continue
+
+        cls = _base_class(type(current))
+        parts = [cls.__name__]
+        for field in cls._fields:
+            value = getattr(current, field, _MISSING)
+            if isinstance(value, AST):
+                parts.append(hashes[id(value)][0])
+            elif isinstance(value, list):
+                parts.append(tuple(hashes[id(item)][0]
+                                   if isinstance(item, AST)
+                                   else _hash_constant(item)
+                                   for item in value))
+            elif value is _MISSING:
+                parts.append(value)
+            else:
+                parts.append(_hash_constant(value))
+        for attr in cls._attributes:
+            if locations or attr not in _LOCATIONS:
+                parts.append(_hash_constant(getattr(current, attr, None)))
+        # Keep a reference to the node, so that its id can't be reused while
+        # it's in the cache.
+        hashes[id(current)] = hash(tuple(parts)), current
+    return hashes[id(node)][0]
+
+
+def clone(node, locations=True):
+    """
+    Return a deep copy of the tree rooted at *node*, built from the fields
+    (and attributes if *locations* is true) of each node. Nodes without fields
+    nor attributes and non-node values are immutable and shared with the
+    original tree. Extra attributes set on nodes are not copied.
+
+    This is much faster than ``copy.deepcopy``, and does not recurse. Copies
+    of frozen nodes are regular nodes.
+    """
+    def make(src):
+        cls = _base_class(type(src))
+        if not cls._fields and not cls._attributes:
+            return src
+        return cls.__new__(cls)
+
+    def copy_value(value):
+        if isinstance(value, AST):
+            new_value = make(value)
+            if new_value is not value:
+                stack.append((value, new_value))
+            return new_value
+        if isinstance(value, list):
+            return [copy_value(item) for item in value]
+        return value
+
+    new_node = make(node)
+    stack = [(node, new_node)] if new_node is not node else []
+    while stack:
+        src, dst = stack.pop()
+        cls = type(dst)
+        for field in cls._fields:
+            try:
+                value = getattr(src, field)
+            except AttributeError:
+                continue
+            setattr(dst, field, copy_value(value))
+
+        attributes = cls._attributes
+        if '_location' in getattr(cls, '__slots__', ()):
+            if locations:
+                try:
+                    dst._location = src._location
+                except AttributeError:
+                    pass
+            attributes = ()
+        for attr in attributes:
+            if locations or attr not in _LOCATIONS:
+                try:
+                    setattr(dst, attr, getattr(src, attr))
+                except AttributeError:
+                    pass
+    return new_node
+
+
+class ConversionProfile(object):
+    """
+    Node counts and cumulative conversion time recorded by the translators
+    created while it is active, see ``profiling``.
+
+    ``stats`` maps (translator class name, node class name, handler name)
+    triplets to [count, seconds] pairs. The handler name is the name of the
+    ``visit_`` method of the translator for that node class, or
+    ``generic_visit``. Times are exclusive: the time spent converting the
+    children of a node is not accounted to the node.
+    """
+
+    def __init__(self):
+        import threading
+        self.stats = {}
+        self.tables = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.previous = None
+
+    def __enter__(self):
+        global _profile
+        self.previous, _profile = _profile, self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _profile
+        _profile, self.previous = self.previous, None
+
+    def _aggregate(self, index):
+        totals = {}
+        for key, (count, elapsed) in self.stats.items():
+            total = totals.setdefault(key[index], [0, 0.])
+            total[0] += count
+            total[1] += elapsed
+        return totals
+
+    def by_node_class(self):
+        """
+        Return a dictionary mapping node class names to [count, seconds].
+        """
+        return self._aggregate(1)
+
+    def by_handler(self):
+        """
+        Return a dictionary mapping handler names to [count, seconds].
+        """
+        return self._aggregate(2)
+
+    def report(self, limit=20):
+        """
+        Return a table of the *limit* most expensive node classes and
+        handlers, per translator.
+        """
+        lines = ["{:<16} {:<20} {:<20} {:>9} {:>10}".format(
+            "translator", "node", "handler", "count", "seconds")]
+        ranked = sorted(self.stats.items(), key=lambda item: -item[1][1])
+        for (translator, node, handler), (count, elapsed) in ranked[:limit]:
+            lines.append("{:<16} {:<20} {:<20} {:>9} {:>10.6f}".format(
+                translator, node, handler, count, elapsed))
+        return "\n".join(lines)
+
+
+# The active ConversionProfile, if any.
+_profile = None
+
+
+def profiling():
+    """
+    Return a context manager recording, while it's active, the number of
+    nodes converted by ``ast_to_gast`` and ``gast_to_ast``, and the time
+    spent converting them, per node class and per translator method::
+
+        with gast.profiling() as profile:
+            tree = gast.parse(source)
+        print(profile.report())
+
+    Translators created outside of the context manager are not slowed down.
+    """
+    return ConversionProfile()
+
+
+def _tree_key(tree):
+    """
+    Return a hashable snapshot of *tree*, locations included: two trees have
+    equal keys if and only if they compare equal, see ``compare``.
+    """
+    keys = {}
+    for node in _post_order(tree):
+        keys[id(node)] = _node_key(node, lambda child: keys[id(child)], True)
+    return keys[id(tree)]
+
+
+class CompileCache(object):
+    """
+    Cache of the code objects produced by ``compile``, meant to be shared by
+    successive calls. It holds at most *maxsize* code objects, and evicts the
+    least recently used one when full.
+
+    ``hits`` and ``misses`` count the calls to ``compile`` that found, or
+    didn't find, their code object in the cache.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = _OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = _allocate_lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def compile(tree, filename, mode, flags=0, dont_inherit=False, optimize=-1,
+            cache=None):
+    """
+    Compile the gast tree *tree* into a code object, see the builtin
+    ``compile`` for the other arguments.
+
+    If *cache* is a ``CompileCache``, the code object of a tree structurally
+    identical to *tree*, locations included, compiled with the same
+    arguments, is looked up there first. The cache is keyed by a hashable
+    snapshot of the tree, so that *tree* can be modified afterwards.
+    """
+    args = (filename, mode, flags, dont_inherit)
+    if optimize != -1:  # not supported by Python 2
+        args += (optimize,)
+    if cache is None:
+        return _compile(gast_to_ast(tree), *args)
+
+    entries = cache.entries
+    key = (_tree_key(tree),) + args
+    with cache.lock:
+        code = entries.pop(key, None)
+        if code is not None:
+            cache.hits += 1
+            entries[key] = code  # now the most recently used
+            return code
+        cache.misses += 1
+
+    # compiled outside of the lock, at the risk of compiling twice
+    code = _compile(gast_to_ast(tree), *args)
+    with cache.lock:
+        entries[key] = code
+        while len(entries) > cache.maxsize:
+            entries.popitem(last=False)
+    return code
+
+
+def _tree_nbytes(tree):
+    """
+    Estimate the memory used by the nodes of *tree* and their lists.
+    """
+    nbytes = 0
+    seen = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        nbytes += _sys.getsizeof(node)
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                nbytes += _sys.getsizeof(value)
+        stack.extend(iter_child_nodes(node))
+    return nbytes
+
+
+class ParseCache(object):
+    """
+    Cache of the trees produced by ``parse``, meant to be shared by
+    successive calls. It holds at most *maxsize* trees, using an estimated
+    total of at most *maxbytes* bytes, and evicts the least recently used
+    trees when full. Trees larger than *maxbytes* are not cached.
+
+    Trees are looked up by a hash of the source and by the other arguments
+    of ``parse``. Each call returns a fresh copy of the cached tree, unless
+    *frozen* is true: the cached tree is then interned, see ``intern_tree``,
+    and shared by all the callers. Only its root is copied for each call.
+
+    ``hits`` and ``misses`` count the calls to ``parse`` that found, or
+    didn't find, their tree in the cache, ``evictions`` the trees evicted.
+    """
+
+    def __init__(self, maxsize=128, maxbytes=64 * 1024 * 1024, frozen=False):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.frozen = frozen
+        self.entries = _OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = _allocate_lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+def _parse_key(source, filename='<unknown>', mode='exec', **kwargs):
+    if isinstance(source, bytes):
+        digest = _sha1(source).digest()
+    else:
+        digest = _sha1(source.encode('utf-8', 'surrogatepass')).digest()
+    return ((type(source), digest, filename, mode) +
+            tuple(sorted(kwargs.items())))
+
+
+def _fresh_root(tree):
+    """
+    Return a shallow copy of the frozen *tree*, with copies of the lists of
+    its root. The root is not frozen, see ``intern_tree``, so each caller
+    gets its own, and may modify or consume it.
+    """
+    import copy
+    root = copy.copy(tree)
+    for field in root._fields:
+        value = getattr(root, field, None)
+        if isinstance(value, list):
+            setattr(root, field, value[:])
+    return root
+
+
+def _cached_parse(cache, args, kwargs, workers):
+    key = _parse_key(*args, **kwargs)
+    entries = cache.entries
+    with cache.lock:
+        entry = entries.pop(key, None)
+        if entry is not None:
+            cache.hits += 1
+            entries[key] = entry  # now the most recently used
+        else:
+            cache.misses += 1
+
+    if entry is None:
+        # parsed outside of the lock, at the risk of parsing twice
+        tree = ast_to_gast(_ast.parse(*args, **kwargs), workers=workers)
+        if cache.frozen:
+            cached = intern_tree(tree, InternTable())
+            tree = _fresh_root(cached)
+        else:
+            cached = clone(tree)  # the caller gets the original
+        entry = cached, _tree_nbytes(cached)
+        with cache.lock:
+            if entry[1] <= cache.maxbytes:
+                previous = entries.pop(key, None)
+                if previous is not None:
+                    cache.nbytes -= previous[1]
+                entries[key] = entry
+                cache.nbytes += entry[1]
+            while (len(entries) > cache.maxsize or
+                   cache.nbytes > cache.maxbytes):
+                cache.nbytes -= entries.popitem(last=False)[1][1]
+                cache.evictions += 1
+        return tree
+
+    return _fresh_root(entry[0]) if cache.frozen else clone(entry[0])
+
+
 # the following are directly imported from python3.8's Lib/ast.py  #
 
 def copy_location(new_node, old_node):
@@ -545,6 +1824,28 @@ def copy_location(new_node, old_node):
     `end_col_offset` attributes) from *old_node* to *new_node* if possible,
     and return *new_node*.
     """
+    if (_PACKED_LOCATIONS and
+            '_location' in getattr(type(new_node), '__slots__', ())):
+        # fast path: complete locations are copied at once
+        location = getattr(old_node, '_location', None)
+        if _is_complete_location(location):
+            new_node._location = location
+            return new_node
+        if old_node._attributes == _LOCATIONS:
+            values = _get_locations(old_node)
+            if _UNSET_LOCATION not in values:
+                new_node._location = _pack_location(values)
+                return new_node
+    elif old_node._attributes == new_node._attributes == _LOCATIONS:
+        # fast path: all locations are usually set
+        try:
+            new_node.lineno = old_node.lineno
+            new_node.col_offset = old_node.col_offset
+            new_node.end_lineno = old_node.end_lineno
+            new_node.end_col_offset = old_node.end_col_offset
+            return new_node
+        except AttributeError:
+            pass
     for attr in 'lineno', 'col_offset', 'end_lineno', 'end_col_offset':
         if attr in old_node._attributes and attr in new_node._attributes \
            and hasattr(old_node, attr):
@@ -609,9 +1910,17 @@ def increment_lineno(node, n=1):
             child.end_lineno = (getattr(child, 'end_lineno', 0) or 0) + n
     return node
 
+def _class_default(cls, name):
+    # The slots of gast nodes shadow the class-level defaults of their base.
+    defaults = getattr(cls, '_defaults', None)
+    if defaults is None:
+        return getattr(cls, name, 42)
+    return defaults.get(name, 42)
+
+
 # Code import from Lib/ast.py
 #
-# minor changes: getattr(x, y, ...) is None => getattr(x, y, 42) is None
+# minor changes: getattr(x, y, ...) is None => _class_default(x, y) is None
 #
 def dump(
     node, annotate_fields=True, include_attributes=False,
@@ -659,7 +1968,7 @@ def dump(
                 except AttributeError:
                     keywords = True
                     continue
-                if value is None and getattr(cls, name, 42) is None:
+                if value is None and _class_default(cls, name) is None:
                     keywords = True
                     continue
                 if not show_empty:
@@ -682,7 +1991,7 @@ def dump(
                         value = getattr(node, name)
                     except AttributeError:
                         continue
-                    if value is None and getattr(cls, name, 42) is None:
+                    if value is None and _class_default(cls, name) is None:
                         continue
                     value, simple = _format(value, level)
                     allsimple = allsimple and simple
@@ -701,3 +2010,9 @@ def dump(
     if indent is not None and not isinstance(indent, str):
         indent = ' ' * indent
     return _format(node)[0]
+
+
+# compile is not star-exported, as it would shadow the builtin in the
+# importing module.
+__all__ = [_name for _name in list(globals())
+           if not _name.startswith('_') and _name != 'compile']
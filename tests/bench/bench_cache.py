@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+Measure parsing the modules of the standard library through a gast.cache
+DiskCache: cold, warm, and after touching every file, against gast.parse.
+
+Usage: python bench_cache.py [path...]
+"""
+import glob
+import os
+import shutil
+import sys
+import sysconfig
+import tempfile
+import time
+
+import gast
+import gast.cache
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '*.py'))):
+            yield src
+
+
+def timed(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return time.perf_counter() - start
+
+
+def main(argv):
+    paths = argv[1:] or [sysconfig.get_paths()['stdlib']]
+    tmp = tempfile.mkdtemp()
+    try:
+        # copies, so that they can be touched
+        files = []
+        for src in sources(paths):
+            with open(src, 'rb') as f:
+                code = f.read()
+            try:
+                gast.parse(code)
+            except (SyntaxError, ValueError):
+                continue
+            files.append(os.path.join(tmp, '{}.py'.format(len(files))))
+            with open(files[-1], 'wb') as f:
+                f.write(code)
+        print("modules: {}".format(len(files)))
+
+        def parse(path):
+            with open(path, 'rb') as f:
+                return gast.parse(f.read(), path)
+
+        print("gast.parse: {:.3f}s".format(timed(parse, files)))
+        cache = gast.cache.DiskCache(os.path.join(tmp, 'cache'))
+        print("cold cache: {:.3f}s".format(timed(cache.parse, files)))
+        size = sum(os.path.getsize(os.path.join(cache.directory, name))
+                   for name in os.listdir(cache.directory))
+        print("warm cache: {:.3f}s ({:.1f} MiB on disk)".format(
+            timed(cache.parse, files), size / 2 ** 20))
+        for path in files:
+            os.utime(path, None)
+        print("touched files: {:.3f}s".format(timed(cache.parse, files)))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""
+Compare gast.clone with copy.deepcopy on trees built from the standard
+library.
+
+Usage: python bench_clone.py [path...]
+"""
+import copy
+import glob
+import os
+import sys
+import sysconfig
+import time
+
+import gast
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '*.py'))):
+            yield src
+
+
+def main(argv):
+    paths = argv[1:] or [sysconfig.get_paths()['stdlib']]
+    trees = []
+    for src in sources(paths):
+        try:
+            with open(src, 'rb') as f:
+                trees.append(gast.parse(f.read()))
+        except (SyntaxError, ValueError):
+            continue
+    nb_nodes = sum(1 for tree in trees for _ in gast.walk(tree))
+    print("modules: {}".format(len(trees)))
+    print("nodes: {}".format(nb_nodes))
+
+    for name, fn in (('copy.deepcopy', copy.deepcopy),
+                     ('gast.clone', gast.clone)):
+        start = time.perf_counter()
+        for tree in trees:
+            fn(tree)
+        elapsed = time.perf_counter() - start
+        print("{}: {:.3f}s ({:.2f} usec per node)".format(
+            name, elapsed, 1e6 * elapsed / nb_nodes))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
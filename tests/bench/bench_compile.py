@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+Measure gast.compile on trees built from the standard library, without
+cache, and when every tree is found in the cache.
+
+Usage: python bench_compile.py [path...]
+"""
+import ast
+import glob
+import os
+import sys
+import sysconfig
+import time
+
+import gast
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '*.py'))):
+            yield src
+
+
+def best_of(fn, args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in args:
+            fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv):
+    paths = argv[1:] or [sysconfig.get_paths()['stdlib']]
+    trees = []
+    for src in sources(paths):
+        try:
+            with open(src, 'rb') as f:
+                trees.append(gast.parse(f.read()))
+        except (SyntaxError, ValueError):
+            continue
+    print("modules: {}".format(len(trees)))
+
+    elapsed = best_of(lambda tree: gast.compile(tree, '<bench>', 'exec'),
+                      trees)
+    print("gast.compile: {:.3f}s".format(elapsed))
+
+    cache = gast.CompileCache(maxsize=len(trees))
+    for tree in trees:
+        gast.compile(tree, '<bench>', 'exec', cache=cache)
+    elapsed = best_of(
+        lambda tree: gast.compile(tree, '<bench>', 'exec', cache=cache),
+        trees)
+    print("gast.compile, cached: {:.3f}s ({} hits, {} misses)".format(
+        elapsed, cache.hits, cache.misses))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+"""
+Time the construction of each gast node class, with all fields passed
+positionally, then as keywords.
+
+Usage: python bench_constructors.py [class name...]
+"""
+import sys
+import timeit
+
+import gast
+from gast.gast import _nodes
+
+
+def main(argv):
+    names = argv[1:] or [name for name, _ in _nodes]
+    total_positional = total_keyword = 0
+    print("{:<20} {:>14} {:>14}".format("class", "positional", "keyword"))
+    for name in names:
+        cls = getattr(gast, name)
+        args = tuple(None for _ in cls._fields)
+        kwargs = dict.fromkeys(cls._fields)
+        number = 100000
+        positional = min(timeit.repeat(lambda: cls(*args), number=number,
+                                       repeat=3)) / number
+        keyword = min(timeit.repeat(lambda: cls(**kwargs), number=number,
+                                    repeat=3)) / number
+        total_positional += positional
+        total_keyword += keyword
+        print("{:<20} {:>11.1f} ns {:>11.1f} ns".format(
+            name, 1e9 * positional, 1e9 * keyword))
+    print("{:<20} {:>11.1f} ns {:>11.1f} ns".format(
+        "average", 1e9 * total_positional / len(names),
+        1e9 * total_keyword / len(names)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
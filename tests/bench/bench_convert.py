@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""
+Measure the conversion time of trees built from the standard library, from
+ast to gast and back, when consuming the gast trees, and when retaining the
+ast trees.
+
+Usage: python bench_convert.py [path...]
+"""
+import ast
+import glob
+import os
+import sys
+import sysconfig
+import time
+
+import gast
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '*.py'))):
+            yield src
+
+
+def best_of(fn, args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in args:
+            fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv):
+    paths = argv[1:] or [sysconfig.get_paths()['stdlib']]
+    trees = []
+    for src in sources(paths):
+        try:
+            with open(src, 'rb') as f:
+                trees.append(ast.parse(f.read()))
+        except (SyntaxError, ValueError):
+            continue
+    gtrees = [gast.ast_to_gast(tree) for tree in trees]
+    nb_nodes = sum(1 for tree in trees for _ in ast.walk(tree))
+    print("modules: {}".format(len(trees)))
+    print("nodes: {}".format(nb_nodes))
+
+    for name, fn, args in (('ast_to_gast', gast.ast_to_gast, trees),
+                           ('gast_to_ast', gast.gast_to_ast, gtrees)):
+        elapsed = best_of(fn, args)
+        print("{}: {:.3f}s ({:.2f} usec per node)".format(
+            name, elapsed, 1e6 * elapsed / nb_nodes))
+
+    # consumed trees can't be converted twice
+    timings = []
+    for _ in range(3):
+        fresh = [gast.ast_to_gast(tree) for tree in trees]
+        start = time.perf_counter()
+        for gtree in fresh:
+            gast.gast_to_ast(gtree, consume=True)
+        timings.append(time.perf_counter() - start)
+    elapsed = min(timings)
+    print("gast_to_ast(consume=True): {:.3f}s ({:.2f} usec per node)".format(
+        elapsed, 1e6 * elapsed / nb_nodes))
+
+    retained = [gast.ast_to_gast(tree, retain=True) for tree in trees]
+    for name, fn, args in (
+            ('ast_to_gast(retain=True)',
+             lambda tree: gast.ast_to_gast(tree, retain=True), trees),
+            ('gast_to_ast of unmodified retained trees', gast.gast_to_ast,
+             retained),
+            # unmodified subtrees are now looked for in every tree
+            ('gast_to_ast of regular trees', gast.gast_to_ast, gtrees)):
+        elapsed = best_of(fn, args)
+        print("{}: {:.3f}s ({:.2f} usec per node)".format(
+            name, elapsed, 1e6 * elapsed / nb_nodes))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
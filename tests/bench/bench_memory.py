@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""
+Measure the memory footprint of gast trees built from the standard library.
+
+Usage: python bench_memory.py [path...]
+
+Each module found under the given paths (the standard library by default) is
+parsed with ``gast.parse``; the memory retained by the resulting tree,
+including the objects it shares with the intermediate ``ast`` tree, is
+accounted for.
+"""
+import glob
+import os
+import sys
+import sysconfig
+import tracemalloc
+
+import gast
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '**', '*.py'),
+                                    recursive=True)):
+            yield src
+
+
+def main(argv):
+    paths = argv[1:] or [sysconfig.get_paths()['stdlib']]
+    nb_nodes = nb_bytes = nb_modules = 0
+    for src in sources(paths):
+        try:
+            with open(src, 'rb') as f:
+                content = f.read()
+            tracemalloc.start()
+            gtree = gast.parse(content)
+        except (SyntaxError, ValueError):
+            tracemalloc.stop()
+            continue
+        nb_bytes += tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nb_nodes += sum(1 for _ in gast.walk(gtree))
+        nb_modules += 1
+        del gtree
+
+    print("modules: {}".format(nb_modules))
+    print("nodes: {}".format(nb_nodes))
+    print("bytes: {}".format(nb_bytes))
+    print("bytes per node: {:.1f}".format(nb_bytes / max(nb_nodes, 1)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Measure the conversion time of a large module, built by concatenating
+modules of the standard library, from ast to gast with a growing number of
+worker threads. Conversion only scales with the number of cores on
+free-threaded builds of Python.
+
+Usage: python bench_parallel.py [max_workers] [path...]
+"""
+import ast
+import glob
+import os
+import sys
+import sysconfig
+import time
+
+import gast
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '*.py'))):
+            yield src
+
+
+def best_of(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv):
+    max_workers = int(argv[1]) if len(argv) > 1 else os.cpu_count()
+    paths = argv[2:] or [sysconfig.get_paths()['stdlib']]
+    module = ast.Module(body=[], type_ignores=[])
+    for src in sources(paths):
+        try:
+            with open(src, 'rb') as f:
+                module.body.extend(ast.parse(f.read()).body)
+        except (SyntaxError, ValueError):
+            continue
+    nb_nodes = sum(1 for _ in ast.walk(module))
+    free_threaded = not getattr(sys, '_is_gil_enabled', lambda: True)()
+    print("statements: {}".format(len(module.body)))
+    print("nodes: {}".format(nb_nodes))
+    print("cpus: {}, free-threaded: {}".format(os.cpu_count(), free_threaded))
+
+    reference = None
+    workers = 1
+    while workers <= max_workers:
+        elapsed = best_of(lambda: gast.ast_to_gast(module, workers=workers))
+        reference = reference or elapsed
+        print("workers={}: {:.3f}s ({:.2f} usec per node, speedup {:.2f})"
+              .format(workers, elapsed, 1e6 * elapsed / nb_nodes,
+                      reference / elapsed))
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(sys.argv)
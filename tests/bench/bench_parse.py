@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+Measure gast.parse on the standard library, against ast.parse alone, lazy
+parsing for a tool that only inspects imports and signatures, selective
+parsing of the test functions, and parsing through a warm ParseCache.
+
+Usage: python bench_parse.py [path...]
+"""
+import ast
+import glob
+import os
+import sys
+import sysconfig
+import time
+
+import gast
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for src in sorted(glob.glob(os.path.join(path, '*.py'))):
+            yield src
+
+
+def best_of(fn, args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in args:
+            fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv):
+    paths = argv[1:] or [sysconfig.get_paths()['stdlib']]
+    codes = []
+    for src in sources(paths):
+        with open(src, 'rb') as f:
+            code = f.read()
+        try:
+            ast.parse(code)
+        except (SyntaxError, ValueError):
+            continue
+        codes.append(code)
+    print("modules: {}".format(len(codes)))
+
+    parse = best_of(ast.parse, codes)
+    print("ast.parse: {:.3f}s".format(parse))
+    elapsed = best_of(gast.parse, codes)
+    print("gast.parse: {:.3f}s (conversion: {:.3f}s)".format(
+        elapsed, elapsed - parse))
+
+    # a typical use of lazy parsing: only look at imports and signatures
+    def scan(code):
+        for stmt in gast.parse(code, lazy=True).body:
+            if isinstance(stmt, (gast.Import, gast.ImportFrom)):
+                [alias.name for alias in stmt.names]
+            elif isinstance(stmt, (gast.FunctionDef, gast.AsyncFunctionDef)):
+                [arg.id for arg in stmt.args.args]
+
+    elapsed = best_of(scan, codes)
+    print("gast.parse(lazy=True) and signature scan: {:.3f}s "
+          "(conversion: {:.3f}s)".format(elapsed, elapsed - parse))
+
+    # selective conversion: only the functions whose name starts with 'test'
+    def select(node):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return node.name.startswith('test')
+        return not isinstance(node, ast.stmt) or isinstance(node, ast.ClassDef)
+
+    elapsed = best_of(lambda code: gast.parse(code, select=select), codes)
+    print("gast.parse(select=...) of test functions: {:.3f}s "
+          "(conversion: {:.3f}s)".format(elapsed, elapsed - parse))
+
+    # every module parsed again, with a warm cache
+    for name, cache in (('ParseCache()', gast.ParseCache()),
+                        ('ParseCache(frozen=True)',
+                         gast.ParseCache(frozen=True))):
+        cache.maxsize = len(codes)
+        cache.maxbytes = float('inf')
+        for code in codes:
+            gast.parse(code, cache=cache)
+        elapsed = best_of(lambda code: gast.parse(code, cache=cache), codes)
+        print("gast.parse(cache={}) hits: {:.3f}s ({} MiB cached)".format(
+            name, elapsed, cache.nbytes // 2 ** 20))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+"""
+Measure gast.parse_paths on the standard library with a growing number of
+worker processes, against a loop over gast.parse_file.
+
+Usage: python bench_parse_paths.py [max_workers] [path...]
+"""
+import os
+import sys
+import sysconfig
+import time
+
+import gast
+
+
+def main(argv):
+    max_workers = int(argv[1]) if len(argv) > 1 else os.cpu_count()
+    paths = argv[2:] or [os.path.join(sysconfig.get_paths()['stdlib'],
+                                      '*.py')]
+    print("cpus: {}".format(os.cpu_count()))
+
+    start = time.perf_counter()
+    files = 0
+    for _ in gast.parse_paths(paths, workers=1):
+        files += 1
+    print("files: {}".format(files))
+    print("loop over gast.parse_file: {:.3f}s".format(
+        time.perf_counter() - start))
+
+    workers = 2
+    while workers <= max(2, max_workers):
+        for ordered in (True, False):
+            start = time.perf_counter()
+            for _ in gast.parse_paths(paths, workers=workers,
+                                      ordered=ordered):
+                pass
+            print("workers={}, ordered={}: {:.3f}s".format(
+                workers, ordered, time.perf_counter() - start))
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+import gast
+
+
+def recording_executor(max_workers):
+    """Return a thread pool that records the futures it creates."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    class RecordingExecutor(ThreadPoolExecutor):
+
+        def __init__(self, *args, **kwargs):
+            super(RecordingExecutor, self).__init__(*args, **kwargs)
+            self.futures = []
+
+        def submit(self, *args, **kwargs):
+            future = super(RecordingExecutor, self).submit(*args, **kwargs)
+            self.futures.append(future)
+            return future
+
+    return RecordingExecutor(max_workers)
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "asyncio interface is 3.7+")
+class AsyncParseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(10):
+            self.paths.append(os.path.join(self.directory,
+                                           '{}.py'.format(i)))
+            with open(self.paths[-1], 'w') as f:
+                f.write('x = {}\n'.format(i) if i != 3 else 'x = (\n')
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    def collect(self, generator):
+        results = []
+        while True:
+            try:
+                results.append(self.loop.run_until_complete(
+                    generator.__anext__()))
+            except StopAsyncIteration:
+                return results
+
+    def test_aparse_file(self):
+        tree = self.loop.run_until_complete(gast.aparse_file(self.paths[1]))
+        self.assertEqual(gast.dump(tree), gast.dump(gast.parse('x = 1')))
+        with self.assertRaises(SyntaxError):
+            self.loop.run_until_complete(gast.aparse_file(self.paths[3]))
+
+    def test_aparse_many(self):
+        results = dict(self.collect(gast.aparse_many(self.paths,
+                                                     concurrency=3)))
+        self.assertEqual(sorted(results), sorted(self.paths))
+        self.assertIsInstance(results[self.paths[3]], SyntaxError)
+        self.assertEqual(results[self.paths[5]].body[0].value.value, 5)
+
+    def test_backpressure(self):
+        executor = recording_executor(2)
+        generator = gast.aparse_many(iter(self.paths), concurrency=3,
+                                     executor=executor)
+        self.loop.run_until_complete(generator.__anext__())
+        self.assertEqual(len(executor.futures), 3)
+        self.loop.run_until_complete(generator.aclose())
+        executor.shutdown()
+
+    def test_cancellation(self):
+        import asyncio
+        executor = recording_executor(1)
+        blocked = threading.Event()
+        executor.submit(blocked.wait)
+        generator = gast.aparse_many(self.paths, concurrency=3,
+                                     executor=executor)
+        task = asyncio.ensure_future(generator.__anext__(), loop=self.loop)
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            self.loop.run_until_complete(task)
+        blocked.set()
+        executor.shutdown()
+        self.assertEqual(len(executor.futures), 1 + 3)
+        self.assertTrue(all(future.cancelled()
+                            for future in executor.futures[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -57,6 +57,20 @@ def foo(x=1, *args, **kwargs):
         norm = "FunctionDef(name='func', args=arguments(vararg=None, kwarg=None), body=[Return(value=Constant(value=1, kind=None))], returns=None, type_comment=None)"
         self.assertEqual(zdump, norm)
 
+    def test_dump_attributes(self):
+        # unset end locations are omitted, as they default to None on the
+        # ast base classes
+        node = gast.Name('x', gast.Load(), None, None)
+        node.lineno, node.col_offset = 1, 0
+        norm = ("Name(id='x', ctx=Load(), annotation=None, "
+                "type_comment=None, lineno=1, col_offset=0)")
+        self.assertEqual(gast.dump(node, include_attributes=True), norm)
+        if sys.version_info >= (3, 8):
+            node = ast.Name('x', ast.Load(), lineno=1, col_offset=0)
+            self.assertEqual(
+                gast.dump(gast.ast_to_gast(node), include_attributes=True),
+                norm)
+
     def test_walk(self):
         code = 'x + 1'
         tree = gast.parse(code, mode='eval')
@@ -204,6 +218,226 @@ def foo(x=1, *args, **kwargs):
         for field in gast.Name._fields:
             self.assertEqual(getattr(node1, field), getattr(node2, field))
 
+    def test_NodeConstructorArity(self):
+        node = gast.Name('id', gast.Load())
+        self.assertEqual(node.id, 'id')
+        self.assertFalse(hasattr(node, 'annotation'))
+        node = gast.Name('id', id='other')
+        self.assertEqual(node.id, 'other')
+        with self.assertRaises(TypeError) as raised:
+            gast.Load(1)
+        self.assertEqual(str(raised.exception),
+                         "Load constructor takes at most 0 positional "
+                         "arguments")
+
+    def test_NodeConstructorExtraKeyword(self):
+        node = gast.Name('id', gast.Load(), None, None, custom='extra')
+        self.assertEqual(node.custom, 'extra')
+        self.assertEqual(node.__dict__, {'custom': 'extra'})
+
+    def test_NodeSlots(self):
+        node = gast.Name('id', gast.Load(), None, None)
+        self.assertEqual(node.__dict__, {})
+        self.assertFalse(hasattr(node, 'lineno'))
+        if sys.version_info >= (3, 9):
+            self.assertIsNone(node.end_lineno)
+        with self.assertRaises(AttributeError):
+            node.unknown
+
+    def test_NodeCopy(self):
+        import copy
+        tree = gast.parse('def foo(x): return x + 1')
+        tree.body[0].custom = 'extra'
+        tree_copy = copy.deepcopy(tree)
+        self.assertEqual(gast.dump(tree, include_attributes=True),
+                         gast.dump(tree_copy, include_attributes=True))
+        self.assertEqual(tree_copy.body[0].custom, 'extra')
+
+    def test_NodePickle(self):
+        import pickle
+        tree = gast.parse('def foo(x): return x + 1')
+        tree.body[0].custom = 'extra'
+        tree_copy = pickle.loads(pickle.dumps(tree))
+        self.assertEqual(gast.dump(tree, include_attributes=True),
+                         gast.dump(tree_copy, include_attributes=True))
+        self.assertEqual(tree_copy.body[0].custom, 'extra')
+
+    def test_SharedSingletons(self):
+        tree = gast.parse('def foo(x, y): return x + y + (x == y)')
+        ret = tree.body[0].body[0].value
+        self.assertIs(ret.left.left.ctx, ret.left.right.ctx)
+        self.assertIs(ret.op, ret.left.op)
+        args = tree.body[0].args.args
+        self.assertIs(args[0].ctx, args[1].ctx)
+
+        ast_tree = gast.gast_to_ast(tree)
+        ast_ret = ast_tree.body[0].body[0].value
+        self.assertIs(ast_ret.left.left.ctx, ast_ret.left.right.ctx)
+        self.assertIs(ast_ret.op, ast_ret.left.op)
+
+    def test_PackedLocations(self):
+        import os
+        import subprocess
+        code = """if 1:
+            import gast, sys
+            assert '_location' in gast.Name.__slots__
+            tree = gast.parse('x = 1')
+            node = tree.body[0].targets[0]
+            assert (node.lineno, node.col_offset) == (1, 0)
+            node.end_lineno, node.end_col_offset = 1, 1
+            new_node = gast.copy_location(gast.Name('y'), node)
+            assert new_node.end_col_offset == 1
+            node.col_offset = None
+            assert node.col_offset is None
+            node.col_offset = -1  # docstrings, on Python 3.7 and earlier
+            assert node.col_offset == -1
+            node.col_offset = 0
+            node.lineno = 2 ** 40
+            assert node.lineno == 2 ** 40 and node.end_lineno == 1
+            del node.lineno
+            assert not hasattr(node, 'lineno')
+            node = gast.Name('y')
+            assert not hasattr(node, 'lineno')
+            if sys.version_info >= (3, 9):
+                assert node.end_lineno is None
+            gast.fix_missing_locations(tree)
+            compile(gast.gast_to_ast(tree), '<test>', 'exec')
+        """
+        env = dict(os.environ, GAST_PACKED_LOCATIONS='1',
+                   PYTHONPATH=os.path.dirname(gast.__path__[0]))
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+
+    @unittest.skipIf(sys.version_info < (3, 7), "no module __getattr__")
+    def test_ImportBudget(self):
+        import os
+        import subprocess
+        code = """if 1:
+            import ast, sys, time
+            start = time.perf_counter()
+            import gast
+            elapsed = time.perf_counter() - start
+            # the import itself only does the minimal amount of work...
+            created = vars(gast.gast)
+            for name in ('Print', 'Exec', 'TemplateStr', 'TypeVar'):
+                assert name not in created, name
+            init = vars(gast.Name)['__init__']
+            assert init.__code__.co_filename == gast.gast.__file__
+            if sys.version_info >= (3, 10):
+                field_types = vars(gast.Name)['_field_types']
+                assert isinstance(field_types, gast.gast._LazyFieldTypes)
+            # ... with a very generous budget, bytecode may not be cached
+            assert elapsed < 1, elapsed
+            # everything is still available on demand
+            assert hasattr(gast, 'Print') and not hasattr(gast, 'Print2')
+            assert gast.Print is gast.gast.Print
+            assert gast.Exec._fields == ('body', 'globals', 'locals')
+            node = gast.Name('x', gast.Load(), None, None)
+            assert type(node).__init__ is not init
+            if sys.version_info >= (3, 10):
+                assert gast.Name._field_types['id'] is str
+                assert gast.TypeVar._field_types['name'] is str
+                assert gast.Load._field_types == {}
+        """
+        env = dict(os.environ,
+                   PYTHONPATH=os.path.dirname(gast.__path__[0]))
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+
+    def test_intern_tree(self):
+        import copy
+        table = gast.InternTable()
+        code0 = 'def foo(self): return self.x + 1'
+        code1 = 'def bar(self): return self.x + 1.'
+        tree0 = gast.intern_tree(gast.parse(code0), table)
+        tree1 = gast.intern_tree(gast.parse(code1), table)
+        self.assertEqual(gast.unparse(tree0), gast.unparse(gast.parse(code0)))
+        self.assertEqual(gast.unparse(tree1), gast.unparse(gast.parse(code1)))
+
+        ret0 = tree0.body[0].body[0].value
+        ret1 = tree1.body[0].body[0].value
+        self.assertIs(ret0.left, ret1.left)
+        self.assertIsNot(ret0.right, ret1.right)
+        self.assertIs(tree0.body[0].args.args[0], tree1.body[0].args.args[0])
+        self.assertGreater(table.hits, 0)
+        self.assertGreater(table.bytes_saved, 0)
+
+        with self.assertRaises(AttributeError):
+            ret0.left.attr = 'y'
+        self.assertEqual(ret0.left.attr, 'x')
+        self.assertIsInstance(ret0.left, gast.Attribute)
+        ret_copy = copy.deepcopy(ret0)
+        ret_copy.left.attr = 'y'
+        self.assertEqual(ret0.left.attr, 'x')
+
+        # the root module is not frozen
+        tree0.body = []
+
+        # subtrees at other locations are not shared, unless asked to
+        tree2 = gast.intern_tree(gast.parse('\n' + code0), table)
+        ret2 = tree2.body[0].body[0].value
+        self.assertIsNot(ret2.left, ret0.left)
+        self.assertEqual(ret2.left.lineno, 2)
+        table = gast.InternTable(locations=False)
+        tree0 = gast.intern_tree(gast.parse(code0), table)
+        tree2 = gast.intern_tree(gast.parse('\n' + code0), table)
+        ret2 = tree2.body[0].body[0].value
+        self.assertIs(ret2.left, tree0.body[0].body[0].value.left)
+        self.assertEqual(ret2.left.lineno, 1)
+
+    def test_compare(self):
+        code = 'def foo(x): return x + 1'
+        self.assertTrue(gast.compare(gast.parse(code), gast.parse(code)))
+        self.assertTrue(gast.compare(gast.parse(code),
+                                     gast.parse('\n' + code)))
+        self.assertFalse(gast.compare(gast.parse(code),
+                                      gast.parse('\n' + code),
+                                      compare_locations=True))
+        self.assertFalse(gast.compare(gast.parse(code),
+                                      gast.parse(code.replace('1', '1.'))))
+        self.assertFalse(gast.compare(gast.parse(code),
+                                      gast.parse(code.replace('1', 'True'))))
+        self.assertFalse(gast.compare(gast.parse(code),
+                                      gast.parse(code.replace('x', 'y'))))
+        self.assertFalse(gast.compare(gast.Name('x'),
+                                      gast.Name('x', gast.Load())))
+
+    def test_structural_hash(self):
+        code = 'def foo(x): return x + 1'
+        tree = gast.parse(code)
+        self.assertEqual(gast.structural_hash(tree),
+                         gast.structural_hash(gast.parse('\n' + code)))
+        self.assertNotEqual(gast.structural_hash(tree, locations=True),
+                            gast.structural_hash(gast.parse('\n' + code),
+                                                 locations=True))
+        self.assertNotEqual(gast.structural_hash(tree),
+                            gast.structural_hash(gast.parse('x + 1')))
+
+        cache = {}
+        value = gast.structural_hash(tree, cache=cache)
+        self.assertEqual(value, gast.structural_hash(tree))
+        self.assertEqual(len(cache), len(set(map(id, gast.walk(tree)))))
+        self.assertEqual(value, gast.structural_hash(tree, cache=cache))
+
+    def test_clone(self):
+        tree = gast.parse('def foo(x): return x + 1')
+        tree_copy = gast.clone(tree)
+        self.assertEqual(gast.dump(tree, include_attributes=True),
+                         gast.dump(tree_copy, include_attributes=True))
+        ret = tree.body[0].body[0].value
+        ret_copy = tree_copy.body[0].body[0].value
+        self.assertIsNot(ret, ret_copy)
+        self.assertIsNot(tree.body, tree_copy.body)
+        self.assertIs(ret.op, ret_copy.op)
+        ret_copy.left.id = 'y'
+        self.assertEqual(ret.left.id, 'x')
+
+        tree_copy = gast.clone(tree, locations=False)
+        self.assertTrue(gast.compare(tree, tree_copy))
+        self.assertFalse(hasattr(tree_copy.body[0], 'lineno'))
+
+        frozen = gast.intern_tree(gast.parse('x + 1'), gast.InternTable())
+        frozen_copy = gast.clone(frozen.body[0])
+        frozen_copy.value.left.id = 'y'
+
     def test_IncompleteNodeConstructor(self):
         afd = gast.FunctionDef(
                     name="f",
@@ -242,6 +476,465 @@ def foo(x=1, *args, **kwargs):
         self.assertEqual(ast_attr.attr, 'attr')
         self.assertFalse(hasattr(ast_attr, '___pyct_anno'))
 
+    def test_translator_dispatch(self):
+        if sys.version_info.major == 3:
+            from gast.ast3 import Ast3ToGAst as ToGAst
+        else:
+            from gast.ast2 import Ast2ToGAst as ToGAst
+
+        class Renamer(ToGAst):
+            def visit_Name(self, node):
+                new_node = ToGAst.visit_Name(self, node)
+                new_node.id = new_node.id.upper()
+                return new_node
+
+        class Counter(ToGAst):
+            count = 0
+
+            def generic_visit(self, node):
+                Counter.count += 1
+                return ToGAst.generic_visit(self, node)
+
+        tree = ast.parse('x + y')
+        self.assertEqual(gast.unparse(Renamer().visit(tree)), 'X + Y')
+        # tables are per translator class
+        self.assertEqual(gast.unparse(gast.ast_to_gast(tree)), 'x + y')
+        self.assertIsNot(Renamer()._dispatch, ToGAst()._dispatch)
+        Counter().visit(tree)
+        self.assertGreater(Counter.count, 0)
+
+    def test_deep_trees(self):
+        # nodes without a dedicated visit_ method on any Python version, the
+        # others still recurse
+        depth = 10 * sys.getrecursionlimit()
+        node = ast.Name('x', ast.Load())
+        for i in range(depth):
+            attr = ast.Attribute(node, 'a', ast.Load())
+            node = ast.BinOp(attr, ast.Add(), ast.Name('y', ast.Load()))
+        tree = ast.Expression(node)
+
+        gtree = gast.ast_to_gast(tree)
+        node, count = gtree.body, 0
+        while isinstance(node, gast.BinOp):
+            self.assertIsInstance(node.left, gast.Attribute)
+            node, count = node.left.value, count + 1
+        self.assertEqual(count, depth)
+        self.assertEqual(node.id, 'x')
+
+        ast_tree = gast.gast_to_ast(gtree)
+        node, count = ast_tree.body, 0
+        while isinstance(node, ast.BinOp):
+            node, count = node.left.value, count + 1
+        self.assertEqual(count, depth)
+        self.assertEqual(node.id, 'x')
+
+    def test_selective_conversion(self):
+        code = ('import os\n'
+                '@jit\n'
+                'def foo(x, y=1):\n    return [x + y] * 2\n'
+                'def bar():\n    return lambda z: z\n'
+                'class A:\n    @jit\n    def m(self): pass')
+
+        def select(node):
+            if isinstance(node, ast.FunctionDef):
+                return any(getattr(d, 'id', None) == 'jit'
+                           for d in node.decorator_list)
+            return not isinstance(node, ast.Import)
+
+        tree = ast.parse(code)
+        for lazy in (False, True):
+            gtree = gast.ast_to_gast(tree, lazy=lazy, select=select)
+            self.assertIsInstance(gtree, gast.Module)
+            self.assertIs(gtree.body[0], tree.body[0])
+            self.assertIs(gtree.body[2], tree.body[2])
+            self.assertIsInstance(gtree.body[1], gast.FunctionDef)
+            self.assertIsInstance(gtree.body[1].args.args[0], gast.Name)
+            self.assertIsInstance(gtree.body[3].body[0], gast.FunctionDef)
+            self.assertEqual(ast.dump(gast.gast_to_ast(gtree)),
+                             ast.dump(tree))
+
+        gtree = gast.parse(code, select=lambda node: False)
+        self.assertIsInstance(gtree, ast.Module)
+
+    def test_consuming_gast_to_ast(self):
+        code = 'def foo(x, y=1):\n    return [x + y, x] * 2\nfoo(1)'
+        expected = ast.dump(ast.parse(code), include_attributes=True)
+        tree = gast.parse(code)
+        # List has no visit_ method on any Python version, unlike Module
+        elts = tree.body[0].body[0].value.left.elts
+        converted = gast.gast_to_ast(tree, consume=True)
+        self.assertEqual(ast.dump(converted, include_attributes=True),
+                         expected)
+        self.assertIs(converted.body[0].body[0].value.left.elts, elts)
+        compile(converted, '<consumed>', 'exec')
+
+        # frozen nodes are left untouched
+        table = gast.InternTable()
+        tree0 = gast.intern_tree(gast.parse(code), table)
+        tree1 = gast.intern_tree(gast.parse(code), table)
+        converted = gast.gast_to_ast(tree0, consume=True)
+        self.assertEqual(ast.dump(converted), ast.dump(ast.parse(code)))
+        self.assertEqual(gast.unparse(tree1),
+                         gast.unparse(gast.parse(code)))
+
+    def test_retain_origin(self):
+        import copy
+        import pickle
+        code = 'import os\ndef foo(x, y=1):\n    return [x + y, 1]\nfoo(1)'
+        tree = ast.parse(code)
+        gtree = gast.ast_to_gast(tree, retain=True)
+        self.assertEqual(gast.dump(gtree), gast.dump(gast.parse(code)))
+        self.assertIs(gast.gast_to_ast(gtree), tree)
+
+        # copies and pickles are regular nodes
+        for clone in (copy.deepcopy(gtree),
+                      pickle.loads(pickle.dumps(gtree))):
+            self.assertIs(type(clone), gast.Module)
+            self.assertEqual(gast.dump(clone), gast.dump(gtree))
+
+        # in place modification of a list
+        gtree.body[1].body[0].value.elts.append(gast.Constant(3, None))
+        converted = gast.gast_to_ast(gtree)
+        self.assertIsNot(converted, tree)
+        self.assertIs(converted.body[0], tree.body[0])
+        self.assertIsNot(converted.body[1], tree.body[1])
+        self.assertIs(converted.body[1].args, tree.body[1].args)
+        self.assertIs(converted.body[2], tree.body[2])
+
+        # attribute modification
+        gtree.body[2].value.func.id = 'bar'
+        self.assertIs(type(gtree.body[2].value.func), gast.Name)
+        converted = gast.gast_to_ast(gtree)
+        self.assertIsNot(converted.body[2], tree.body[2])
+        self.assertEqual(ast.dump(converted), ast.dump(ast.parse(
+            'import os\ndef foo(x, y=1):\n    return [x + y, 1, 3]\nbar(1)')))
+        self.assertEqual(tree.body[2].value.func.id, 'foo')
+
+        # only trees with an unmodified root are looked for origins
+        gtree = gast.ast_to_gast(ast.parse(code), retain=True)
+        gtree.type_ignores = []
+        converted = gast.gast_to_ast(gtree)
+        self.assertIsNot(converted.body[0], gtree.body[0].__dict__['_origin'])
+
+        # children moved around
+        tree = ast.parse(code)
+        gtree = gast.ast_to_gast(tree, retain=True)
+        gtree.body[0], gtree.body[2] = gtree.body[2], gtree.body[0]
+        converted = gast.gast_to_ast(gtree)
+        self.assertIs(converted.body[0], tree.body[2])
+        self.assertEqual(type(converted.body[2]), ast.Import)
+
+        # children returned as is by their parent's handler, such as the
+        # slice of a Subscript before Python 3.9
+        code = 'x = a[i]'
+        tree = ast.parse(code)
+        gtree = gast.ast_to_gast(tree, retain=True)
+        gtree.body[0].value.value = gast.Name('b', gast.Load(), None, None)
+        converted = gast.gast_to_ast(gtree)
+        self.assertEqual(ast.dump(converted), ast.dump(ast.parse('x = b[i]')))
+        compile(ast.fix_missing_locations(converted), '<retained>', 'exec')
+        gtree = gast.ast_to_gast(ast.parse(code), retain=True)
+        self.assertEqual(ast.dump(gast.gast_to_ast(gtree)),
+                         ast.dump(ast.parse(code)))
+
+        with self.assertRaises(ValueError):
+            gast.parse(code, lazy=True, retain=True)
+
+    def test_compile(self):
+        code = 'x = 1\ny = x + 1'
+        tree = gast.parse(code)
+        namespace = {}
+        exec(gast.compile(tree, '<gast>', 'exec'), namespace)
+        self.assertEqual(namespace['y'], 2)
+
+        cache = gast.CompileCache(maxsize=2)
+        code_object = gast.compile(tree, '<gast>', 'exec', cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertIs(gast.compile(gast.parse(code), '<gast>', 'exec',
+                                   cache=cache),
+                      code_object)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # the cache holds a copy of the tree
+        tree.body[0].value.value = 2
+        other_code_object = gast.compile(tree, '<gast>', 'exec', cache=cache)
+        self.assertIsNot(other_code_object, code_object)
+        exec(other_code_object, namespace)
+        self.assertEqual(namespace['y'], 3)
+
+        # locations and arguments are part of the key
+        gast.increment_lineno(tree, 1)
+        gast.compile(tree, '<gast>', 'exec', cache=cache)
+        gast.compile(tree, '<other>', 'exec', cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+        self.assertEqual(len(cache), 2)
+
+        # least recently used entries are evicted
+        gast.compile(gast.parse(code), '<gast>', 'exec', cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 5))
+
+    def test_parallel_conversion(self):
+        code = '\n'.join('def foo{0}(x):\n    return x + {0}'.format(i)
+                         for i in range(50))
+        tree = gast.parse(code)
+        self.assertEqual(dump(gast.parse(code, workers=4)), dump(tree))
+        self.assertEqual(dump(gast.parse(code, workers=100)), dump(tree))
+        self.assertEqual(dump(gast.parse('', workers=4)),
+                         dump(gast.parse('')))
+
+        # converted nodes are still linked to their source
+        pytree = ast.parse(code)
+        gtree = gast.ast_to_gast(pytree, retain=True, workers=4)
+        self.assertEqual(dump(gtree), dump(tree))
+        self.assertIs(gast.gast_to_ast(gtree), pytree)
+        gtree.body.pop()
+        converted = gast.gast_to_ast(gtree)
+        self.assertIsNot(converted, pytree)
+        self.assertIs(converted.body[0], pytree.body[0])
+
+        # selective conversion, of the body or of the whole module
+        gtree = gast.ast_to_gast(
+            pytree, workers=4,
+            select=lambda node: not isinstance(node, ast.Return))
+        self.assertIsInstance(gtree.body[7].body[0], ast.Return)
+        self.assertIs(gast.ast_to_gast(pytree, workers=4,
+                                       select=lambda node: False),
+                      pytree)
+
+        # errors are raised in the calling thread
+        def failing(node):
+            if node is pytree.body[30]:
+                raise ValueError(node.name)
+            return True
+        with self.assertRaises(ValueError):
+            gast.ast_to_gast(pytree, workers=4, select=failing)
+
+    def test_parse_cache(self):
+        code = 'def foo(x):\n    return x + 1\n'
+        cache = gast.ParseCache(maxsize=2)
+        tree = gast.parse(code, cache=cache)
+        self.assertEqual(dump(tree), dump(gast.parse(code)))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        # callers get fresh copies
+        tree.body[0].name = 'bar'
+        other_tree = gast.parse(code, cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIsNot(other_tree, tree)
+        self.assertEqual(other_tree.body[0].name, 'foo')
+        self.assertEqual(dump(other_tree), dump(gast.parse(code)))
+
+        # the other arguments are part of the key
+        gast.parse(code, '<other>', cache=cache)
+        # as is the type of the source
+        gast.parse(code.encode() if sys.version_info.major == 3
+                   else code.decode(), cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertGreater(cache.nbytes, 0)
+
+        # trees are bounded in size too
+        cache = gast.ParseCache(maxbytes=cache.nbytes)
+        gast.parse(code, cache=cache)
+        gast.parse(code * 2, cache=cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 1)
+        gast.parse(code * 100, cache=cache)
+        self.assertEqual(len(cache), 1)
+
+        # frozen trees are shared, but their root
+        cache = gast.ParseCache(frozen=True)
+        tree = gast.parse(code, cache=cache)
+        other_tree = gast.parse(code, cache=cache)
+        self.assertIsNot(other_tree, tree)
+        self.assertIs(other_tree.body[0], tree.body[0])
+        with self.assertRaises(AttributeError):
+            tree.body[0].name = 'bar'
+        self.assertEqual(dump(tree), dump(gast.parse(code)))
+
+        # so that callers may modify or consume it
+        tree.body.append(gast.Pass())
+        other_tree.body = []
+        gast.gast_to_ast(gast.parse(code, cache=cache), consume=True)
+        self.assertEqual(dump(gast.parse(code, cache=cache)),
+                         dump(gast.parse(code)))
+
+        with self.assertRaises(ValueError):
+            gast.parse(code, cache=cache, lazy=True)
+
+    def test_parse_file(self):
+        import os
+        import tempfile
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'source.py')
+        try:
+            with open(path, 'wb') as f:
+                # a unicode literal, to get text on Python 2 too
+                f.write(b'# -*- coding: latin-1 -*-\nx = u"\xe9"\n')
+            tree = gast.parse_file(path)
+            self.assertEqual(tree.body[0].value.value, u'\xe9')
+
+            with open(path, 'wb') as f:
+                f.write(b'\xef\xbb\xbfx = u"\xc3\xa9"\n')
+            tree = gast.parse_file(path, lazy=True)
+            self.assertEqual(tree.body[0].value.value, u'\xe9')
+
+            with open(path, 'wb') as f:
+                f.write(b'x = (\n')
+            with self.assertRaises(SyntaxError) as context:
+                gast.parse_file(path)
+            self.assertEqual(context.exception.filename, path)
+            with self.assertRaises(SyntaxError) as context:
+                gast.parse_file(path, filename='<other>')
+            self.assertEqual(context.exception.filename, '<other>')
+        finally:
+            os.remove(path)
+            os.rmdir(directory)
+
+    def test_parse_paths(self):
+        import os
+        import shutil
+        import tempfile
+        directory = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(directory, 'pkg'))
+            sources = {'a.py': 'x = 1\n', 'b.py': 'x = (\n',
+                       os.path.join('pkg', 'c.py'): 'def foo(): pass\n',
+                       os.path.join('pkg', 'd.txt'): 'x = 1\n'}
+            for name, code in sources.items():
+                with open(os.path.join(directory, name), 'w') as f:
+                    f.write(code)
+            paths = [os.path.join(directory, '*.py'),
+                     os.path.join(directory, 'pkg'),
+                     os.path.join(directory, 'missing.py')]
+            expected = [os.path.join(directory, name)
+                        for name in ('a.py', 'b.py',
+                                     os.path.join('pkg', 'c.py'),
+                                     'missing.py')]
+
+            for workers in (1, 2):
+                results = list(gast.parse_paths(paths, workers=workers))
+                self.assertEqual([path for path, _ in results], expected)
+                self.assertEqual(dump(results[0][1]),
+                                 dump(gast.parse('x = 1')))
+                self.assertIsInstance(results[1][1], SyntaxError)
+                self.assertEqual(results[1][1].filename, expected[1])
+                self.assertIsInstance(results[2][1].body[0], gast.FunctionDef)
+                self.assertIsInstance(results[3][1], EnvironmentError)
+
+            # a single path is not iterated over
+            pkg = os.path.join(directory, 'pkg')
+            results = list(gast.parse_paths(pkg, workers=1))
+            self.assertEqual([path for path, _ in results], [expected[2]])
+            results = list(gast.parse_paths(pkg.encode(), workers=1))
+            self.assertEqual([path for path, _ in results],
+                             [expected[2].encode()])
+            self.assertIsInstance(results[0][1].body[0], gast.FunctionDef)
+            if sys.version_info >= (3, 6):
+                import pathlib
+                results = list(gast.parse_paths(pathlib.Path(pkg)))
+                self.assertEqual([path for path, _ in results],
+                                 [expected[2]])
+
+            results = gast.parse_paths(paths, workers=2, ordered=False,
+                                       type_comments=True)
+            self.assertEqual(sorted(path for path, _ in results),
+                             sorted(expected))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_profiling(self):
+        code = 'def foo(x):\n    return bar(x, 1)'
+        tree = gast.parse(code)
+        with gast.profiling() as profile:
+            gast.gast_to_ast(gast.parse(code))
+        # translators created outside of the context are not profiled
+        gast.gast_to_ast(tree)
+
+        if sys.version_info.major == 3:
+            from gast.ast3 import Ast3ToGAst as ToGAst, GAstToAst3 as ToAst
+        else:
+            from gast.ast2 import Ast2ToGAst as ToGAst, GAstToAst2 as ToAst
+
+        def handler(translator, node_class):
+            # the visit_ methods differ from one Python version to another
+            name = 'visit_' + node_class
+            return name if hasattr(translator, name) else 'generic_visit'
+
+        by_node_class = profile.by_node_class()
+        self.assertEqual(by_node_class['Call'][0], 2)
+        self.assertEqual(by_node_class['FunctionDef'][0], 2)
+        for translator in (ToGAst, ToAst):
+            for node_class in ('FunctionDef', 'Call', 'Return'):
+                key = (translator.__name__, node_class,
+                       handler(translator, node_class))
+                self.assertEqual(profile.stats[key][0], 1)
+        by_handler = profile.by_handler()
+        self.assertIn('generic_visit', by_handler)
+        self.assertIn('visit_Name', by_handler)
+        self.assertTrue(all(elapsed >= 0
+                            for _, elapsed in profile.stats.values()))
+        self.assertIn(handler(ToGAst, 'FunctionDef'), profile.report())
+        self.assertIsNone(gast.gast._profile)
+
+    def test_star_import(self):
+        namespace = {}
+        exec('from gast import *', namespace)
+        self.assertIn('parse', namespace)
+        self.assertIn('Name', namespace)
+        # the builtin is not shadowed
+        self.assertNotIn('compile', namespace)
+        # node classes created on first access are exported too
+        for name in ('Print', 'TemplateStr', 'TypeVar'):
+            self.assertIn(name, namespace)
+            self.assertIn(name, dir(gast))
+
+    def test_lazy_parse(self):
+        import pickle
+        code = ('import os\ndef foo(x, y=1):\n    return [x + y] * 2\n'
+                'foo(1) + 2')
+        tree = gast.parse(code)
+        lazy_tree = gast.parse(code, lazy=True)
+
+        # BinOp has no visit_ method on any Python version
+        binop = lazy_tree.body[-1].value
+        self.assertIsInstance(binop, gast.BinOp)
+        self.assertIsNot(type(binop), gast.BinOp)
+        self.assertEqual(type(binop).__name__, 'BinOp')
+        self.assertEqual(binop.lineno, 4)
+        self.assertEqual(binop.left.func.id, 'foo')
+        self.assertIs(type(binop), gast.BinOp)
+
+        # explicitly set fields are kept
+        ret = lazy_tree.body[1].body[0]
+        ret.value = gast.Constant(None, None)
+        self.assertEqual(ret.lineno, 3)
+        self.assertEqual(ret.value.value, None)
+        ret.value = tree.body[1].body[0].value
+
+        self.assertTrue(gast.compare(lazy_tree, tree, compare_locations=True))
+        self.assertEqual(gast.dump(gast.parse(code, lazy=True)),
+                         gast.dump(tree))
+        self.assertEqual(len(list(gast.walk(gast.parse(code, lazy=True)))),
+                         len(list(gast.walk(tree))))
+        self.assertEqual(
+            dump(pickle.loads(pickle.dumps(gast.parse(code, lazy=True)))),
+            dump(tree))
+        compile(gast.gast_to_ast(gast.parse(code, lazy=True)), '<lazy>',
+                'exec')
+
+        class Visitor(gast.NodeVisitor):
+            def __init__(self):
+                self.names = []
+
+            def visit_Name(self, node):
+                self.names.append(node.id)
+
+        visitor = Visitor()
+        visitor.visit(gast.parse(code, lazy=True))
+        self.assertEqual(visitor.names, ['x', 'y', 'x', 'y', 'foo'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,123 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import gast
+import gast.cache
+
+try:
+    from StringIO import StringIO  # python2
+except ImportError:
+    from io import StringIO
+
+
+def dump(node):
+    return gast.dump(node, show_empty=True)
+
+
+class DiskCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, 'cache')
+        self.source = os.path.join(self.directory, 'source.py')
+        self.write('def foo(x):\n    return x + 1\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, code, mtime=None):
+        with open(self.source, 'w') as f:
+            f.write(code)
+        if mtime is not None:
+            os.utime(self.source, (mtime, mtime))
+
+    def test_parse(self):
+        cache = gast.cache.DiskCache(self.cache_directory)
+        tree = cache.parse(self.source)
+        with open(self.source) as f:
+            self.assertEqual(dump(tree), dump(gast.parse(f.read())))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        # entries survive the cache object
+        cache = gast.cache.DiskCache(self.cache_directory)
+        self.assertEqual(dump(cache.parse(self.source)), dump(tree))
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(len(os.listdir(self.cache_directory)), 1)
+
+        # parse arguments are part of the key
+        cache.parse(self.source, mode='exec')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(len(os.listdir(self.cache_directory)), 2)
+
+        # touched but unchanged files are not parsed again
+        self.write('def foo(x):\n    return x + 1\n', time.time() - 10)
+        cache.parse(self.source)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+        # modified files are
+        self.write('def foo(x):\n    return x + 2\n', time.time() - 5)
+        tree = cache.parse(self.source)
+        self.assertEqual(tree.body[0].body[0].value.right.value, 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+        # syntax errors refer to the file
+        self.write('def foo(x):\n    return x +\n', time.time())
+        with self.assertRaises(SyntaxError) as context:
+            cache.parse(self.source)
+        self.assertEqual(context.exception.filename, self.source)
+
+    def test_corrupted_entry(self):
+        cache = gast.cache.DiskCache(self.cache_directory)
+        tree = cache.parse(self.source)
+        entry = cache.entry_path(self.source, {})
+        with open(entry, 'wb') as f:
+            f.write(b'garbage')
+        self.assertEqual(dump(cache.parse(self.source)), dump(tree))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_unwritable_directory(self):
+        # a file rather than a directory
+        cache = gast.cache.DiskCache(self.source)
+        tree = cache.parse(self.source)
+        self.assertEqual(dump(cache.parse(self.source)), dump(tree))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_prune(self):
+        cache = gast.cache.DiskCache(self.cache_directory)
+        cache.parse(self.source)
+        cache.parse(self.source, mode='exec')
+        stdout = sys.stdout
+        sys.stdout = output = StringIO()
+        try:
+            status = gast.cache.main(['prune', self.cache_directory])
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(status, 0)
+        self.assertEqual(output.getvalue(),
+                         'removed 0 files from {}\n'.format(
+                             self.cache_directory))
+        self.assertEqual(len(os.listdir(self.cache_directory)), 2)
+
+        # the least recently used entry goes first
+        other = cache.entry_path(self.source, {'mode': 'exec'})
+        os.utime(other, (time.time() - 10, time.time() - 10))
+        self.assertEqual(cache.prune(max_size=os.path.getsize(other)), 1)
+        self.assertEqual(os.listdir(self.cache_directory),
+                         [os.path.basename(cache.entry_path(self.source, {}))])
+
+        # so do entries of modified files
+        self.write('pass\n', time.time() - 5)
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(os.listdir(self.cache_directory), [])
+
+        cache.parse(self.source)
+        self.assertEqual(cache.prune(max_age=3600), 0)
+        self.assertEqual(cache.prune(max_age=-1), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
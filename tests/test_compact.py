@@ -0,0 +1,101 @@
+import glob
+import os
+import subprocess
+import sys
+import unittest
+
+import gast
+from gast.compact import to_compact, from_compact, CompactTree
+
+
+class CompactTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.srcs = glob.glob(os.path.join(gast.__path__[0], '*.py'))
+        if sys.version_info < (3, 7):
+            # the asyncio interface uses async syntax
+            self.srcs = [src for src in self.srcs
+                         if os.path.basename(src) != 'aio.py']
+
+    def assertSameTree(self, tree, other):
+        self.assertEqual(gast.dump(tree, include_attributes=True),
+                         gast.dump(other, include_attributes=True))
+
+    def test_roundtrip(self):
+        for src_py in self.srcs:
+            with open(src_py) as f:
+                content = f.read()
+            gnode = gast.parse(content)
+            self.assertSameTree(gnode, from_compact(to_compact(gnode)))
+
+    def test_bytes_roundtrip(self):
+        for src_py in self.srcs:
+            with open(src_py) as f:
+                content = f.read()
+            gnode = gast.parse(content)
+            buf = to_compact(gnode).tobytes()
+            self.assertSameTree(gnode, from_compact(buf))
+            self.assertSameTree(gnode,
+                                from_compact(CompactTree.frombytes(buf)))
+
+    def test_missing_values(self):
+        node = gast.Name('x', gast.Load(), None, None)
+        node.lineno = None
+        tree = from_compact(to_compact(node))
+        self.assertIsNone(tree.lineno)
+        self.assertFalse(hasattr(tree, 'col_offset'))
+
+        tree = from_compact(to_compact(gast.Name('x')))
+        self.assertEqual(tree.id, 'x')
+        self.assertFalse(hasattr(tree, 'ctx'))
+
+    def test_navigation(self):
+        code = 'def foo(x, y=1): return x\nclass bar: pass'
+        compact = to_compact(gast.parse(code))
+        self.assertEqual(compact.kind(0), 'Module')
+        root = compact.node()
+        self.assertEqual([stmt.kind for stmt in root.body],
+                         ['FunctionDef', 'ClassDef'])
+        index, = compact.find('FunctionDef')
+        func = compact.node(index)
+        self.assertEqual(func.name, 'foo')
+        self.assertEqual([arg.id for arg in func.args.args], ['x', 'y'])
+        self.assertEqual(func.args.defaults[0].value, 1)
+        if sys.version_info >= (3, 8):
+            self.assertEqual(compact.location(index), (1, 0, 1, 25))
+        else:
+            self.assertEqual(compact.location(index), (1, 0, None, None))
+        self.assertEqual(func.lineno, 1)
+        self.assertEqual(sorted(compact.kind(child)
+                                for child in compact.children(index)),
+                         ['Return', 'arguments'])
+        with self.assertRaises(AttributeError):
+            func.nope
+
+    def test_unconverted_nodes(self):
+        import ast
+        tree = gast.parse('def foo(x): pass',
+                          select=lambda node: not isinstance(node,
+                                                             ast.FunctionDef))
+        with self.assertRaises(TypeError) as context:
+            to_compact(tree)
+        self.assertIn('FunctionDef', str(context.exception))
+
+    @unittest.skipIf(sys.version_info < (3, 7),
+                     "node classes are all created upfront")
+    def test_lazy_node_classes(self):
+        # only the node classes of the kinds in use are created
+        code = """if 1:
+            import gast
+            from gast.compact import to_compact, from_compact
+            compact = to_compact(gast.parse('x = 1'))
+            from_compact(compact.tobytes())
+            assert 'TemplateStr' not in vars(gast.gast)
+        """
+        env = dict(os.environ,
+                   PYTHONPATH=os.path.dirname(gast.__path__[0]))
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+
+
+if __name__ == '__main__':
+    unittest.main()
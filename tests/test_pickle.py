@@ -0,0 +1,78 @@
+import glob
+import os
+import pickle
+import sys
+import sysconfig
+import unittest
+
+import gast
+
+
+class PickleTestCase(unittest.TestCase):
+
+    def assertRoundTrip(self, tree):
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            tree_copy = pickle.loads(pickle.dumps(tree, protocol=protocol))
+            self.assertEqual(gast.dump(tree, include_attributes=True),
+                             gast.dump(tree_copy, include_attributes=True))
+
+    def test_stdlib(self):
+        stdlib = sysconfig.get_paths()['stdlib']
+        for src_py in sorted(glob.glob(os.path.join(stdlib, '*.py'))):
+            with open(src_py, 'rb') as f:
+                content = f.read()
+            try:
+                tree = gast.parse(content)
+            except SyntaxError:
+                continue
+            tree_copy = pickle.loads(pickle.dumps(tree))
+            self.assertTrue(gast.compare(tree, tree_copy,
+                                         compare_locations=True),
+                            src_py)
+
+    def test_missing_fields(self):
+        node = gast.Name(ctx=gast.Load(), type_comment='comment')
+        node_copy = pickle.loads(pickle.dumps(node))
+        self.assertFalse(hasattr(node_copy, 'id'))
+        self.assertFalse(hasattr(node_copy, 'annotation'))
+        self.assertIsInstance(node_copy.ctx, gast.Load)
+        self.assertEqual(node_copy.type_comment, 'comment')
+
+    def test_attributes(self):
+        if sys.version_info >= (3, 8):
+            tree = gast.parse('x = 1  # type: ignore[attr]',
+                              type_comments=True)
+        else:
+            tree = gast.parse('x = 1')
+        self.assertRoundTrip(tree)
+        node = tree.body[0]
+        node.lineno = None
+        del node.col_offset
+        node_copy = pickle.loads(pickle.dumps(node))
+        self.assertIsNone(node_copy.lineno)
+        self.assertFalse(hasattr(node_copy, 'col_offset'))
+        self.assertEqual(getattr(node_copy, 'end_lineno', None),
+                         getattr(node, 'end_lineno', None))
+
+        # the column of docstrings, on Python 3.7 and earlier
+        node.col_offset = -1
+        node_copy = pickle.loads(pickle.dumps(node))
+        self.assertEqual(node_copy.col_offset, -1)
+        self.assertIsNone(node_copy.lineno)
+
+    def test_extra_attributes(self):
+        tree = gast.parse('def foo(x): return x + 1')
+        tree.body[0].custom = 'extra'
+        tree_copy = pickle.loads(pickle.dumps(tree))
+        self.assertEqual(tree_copy.body[0].custom, 'extra')
+        self.assertRoundTrip(tree)
+
+    def test_legacy_state(self):
+        node = gast.Name.__new__(gast.Name)
+        node.__setstate__({'id': 'x', 'ctx': gast.Load(), 'lineno': 1})
+        self.assertEqual(node.id, 'x')
+        self.assertEqual(node.lineno, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
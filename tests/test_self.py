@@ -1,5 +1,6 @@
 import glob
 import os
+import sys
 import unittest
 
 import gast
@@ -9,6 +10,10 @@ class SelfTestCase(unittest.TestCase):
 
     def setUp(self):
         self.srcs = glob.glob(os.path.join(gast.__path__[0], '*.py'))
+        if sys.version_info < (3, 7):
+            # the asyncio interface uses async syntax
+            self.srcs = [src for src in self.srcs
+                         if os.path.basename(src) != 'aio.py']
 
     def testParse(self):
         for src_py in self.srcs: